@@ -0,0 +1,29 @@
+"""
+Celery application for CryptFyles
+
+Runs file encryption (files.tasks) outside the web workers.
+Start a worker with: celery -A cryptfyles worker -B
+
+The worker reads staged uploads from UPLOAD_STAGING_ROOT and writes
+ciphertext to MEDIA_ROOT; when it runs in its own container, both must
+point at a volume shared with the web process.
+
+-B embeds the beat scheduler, which runs files.tasks.sweep_stale_uploads
+hourly (CELERY_BEAT_SCHEDULE) to delete uploads whose encryption task was
+lost. Run exactly one worker with -B; without beat, schedule
+`python manage.py sweep_uploads` externally instead.
+"""
+import os
+from celery import Celery
+
+# Use production settings on Railway, development locally (as in wsgi.py)
+if os.getenv('RAILWAY_ENVIRONMENT'):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cryptfyles.settings_prod')
+else:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cryptfyles.settings')
+
+app = Celery('cryptfyles')
+
+# Read CELERY_* settings from Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
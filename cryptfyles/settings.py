@@ -107,6 +107,16 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# Argon2id first (memory-hard, same KDF family that protects private keys);
+# PBKDF2 stays so existing hashes verify and are upgraded on next login
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -141,15 +151,59 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Custom User Model (we'll create this in Step 2)
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Loads only the user columns each auth path needs
+AUTHENTICATION_BACKENDS = ['users.backends.CustomUserBackend']
+
+# Rate-limit failed logins by X-Forwarded-For instead of REMOTE_ADDR; only
+# safe behind a proxy that appends the client address
+LOGIN_TRUST_X_FORWARDED_FOR = False
+
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10737418240  # 10GB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10737418240   # 10GB
+# Uploads larger than this spill to a TemporaryUploadedFile on disk and are
+# encrypted in streaming fashion (see HybridEncryption.encrypt_file_stream)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+
+# Plaintext uploads waiting for the encryption worker (never served)
+UPLOAD_STAGING_ROOT = BASE_DIR / 'upload_staging'
+
+# Uploads at least this large are encrypted by the Celery worker; smaller
+# ones are encrypted inline during the request
+UPLOAD_ASYNC_THRESHOLD = 10 * 1024 * 1024  # 10MB
+
+# PENDING uploads and staged plaintext older than this are deleted by
+# files.tasks.sweep_stale_uploads (encryption was lost or crashed)
+UPLOAD_STALE_AFTER = 6 * 60 * 60  # seconds
+
+# Celery (background file encryption, see files.tasks)
+# Development runs tasks inline; production uses a Redis broker
+CELERY_BROKER_URL = 'memory://'
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_IGNORE_RESULT = True
+# Run by the beat scheduler embedded in the Procfile worker (-B)
+CELERY_BEAT_SCHEDULE = {
+    'sweep-stale-uploads': {
+        'task': 'files.tasks.sweep_stale_uploads',
+        'schedule': 60 * 60,
+    },
+}
+
+# Cache (sessions and other hot per-request data)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
 
 # Session settings
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Sessions are read from the cache and written through to the database,
+# so authenticated requests normally skip the session SELECT
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = False
 SESSION_COOKIE_AGE = 3600
+# Only requests that change the session write it back
+SESSION_SAVE_EVERY_REQUEST = False
 
 # Login/Logout URLs
 LOGIN_URL = 'users:login'
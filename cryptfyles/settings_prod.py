@@ -10,14 +10,8 @@ import os
 # ===== DEBUG & SECURITY =====
 DEBUG = False
 
-# SECRET_KEY - With default fallback for Railway
-try:
-    SECRET_KEY = config('SECRET_KEY')
-except:
-    # If SECRET_KEY not found, generate a fallback
-    # (This should NEVER happen in production, but prevents crashes)
-    import secrets
-    SECRET_KEY = 'django-insecure-' + secrets.token_urlsafe(50)
+# SECRET_KEY - Required; fail at boot if it is missing
+SECRET_KEY = config('SECRET_KEY')
 
 # ALLOWED_HOSTS - Read from environment
 ALLOWED_HOSTS = config(
@@ -27,32 +21,50 @@ ALLOWED_HOSTS = config(
 )
 
 # ===== DATABASE - PostgreSQL =====
-try:
-    DATABASES = {
-        'default': dj_database_url.config(
-            default=config('DATABASE_URL'),
-            conn_max_age=600,
-            conn_health_checks=True,
-        )
-    }
-except Exception as e:
-    # Fallback - should not happen but prevents crash
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
-        }
-    }
-    print(f"⚠️ Database error, using SQLite fallback: {e}")
+# DATABASE_URL is required: falling back to SQLite in production would
+# silently lose every upload on the next container restart
+DATABASES = {
+    'default': dj_database_url.config(
+        default=config('DATABASE_URL'),
+        # Persistent connections are mutually exclusive with the pool
+        conn_max_age=0,
+    )
+}
+
+# psycopg3 connection pool (several connections per worker, no
+# per-request TCP/TLS/auth handshake)
+DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+    'min_size': config('DB_POOL_MIN', default=2, cast=int),
+    'max_size': config('DB_POOL_MAX', default=8, cast=int),
+    'timeout': 10,
+}
 
 # ===== STATIC FILES =====
 MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage',
+    },
+}
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Serve only the precompressed collectstatic output (.gz and, with Brotli
+# installed, .br) rather than scanning finders at runtime
+WHITENOISE_USE_FINDERS = False
 
 # ===== HTTPS SECURITY =====
+# Railway's edge terminates TLS and redirects plain HTTP itself; trust its
+# X-Forwarded-Proto so request.is_secure() is correct behind the proxy
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+# Every request arrives from the edge, so REMOTE_ADDR is the proxy; the
+# login rate limit keys on the address the edge appends instead
+LOGIN_TRUST_X_FORWARDED_FOR = True
 
-SECURE_SSL_REDIRECT = False
+# Only needed when the edge does not redirect HTTP -> HTTPS
+SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=False, cast=bool)
 SESSION_COOKIE_SECURE = False
 CSRF_COOKIE_SECURE = False
 
@@ -67,19 +79,30 @@ CSRF_TRUSTED_ORIGINS = config(
     cast=Csv()
 )
 
-# ===== CLOUDINARY FILE STORAGE =====
-try:
-    import cloudinary
-    import cloudinary.uploader
-    
-    cloudinary.config(
-        cloud_name=config('CLOUDINARY_CLOUD_NAME', default=''),
-        api_key=config('CLOUDINARY_API_KEY', default=''),
-        api_secret=config('CLOUDINARY_API_SECRET', default=''),
-        secure=True
-    )
-except Exception as e:
-    print(f"⚠️ Cloudinary not configured: {e}")
+# ===== CELERY =====
+# File encryption runs in the `worker` process (see Procfile)
+CELERY_BROKER_URL = config('REDIS_URL')
+CELERY_TASK_ALWAYS_EAGER = False
+# Re-deliver an encryption job if the worker dies mid-file
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# The worker reads staged plaintext from UPLOAD_STAGING_ROOT and writes the
+# ciphertext into MEDIA_ROOT, which the web process serves downloads from.
+# Both must be on a volume mounted by web and worker alike; with separate
+# containers and local paths, uploads become READY rows whose ciphertext
+# the web process cannot open.
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(MEDIA_ROOT))
+UPLOAD_STAGING_ROOT = config('UPLOAD_STAGING_ROOT', default=str(UPLOAD_STAGING_ROOT))
+
+# ===== CACHE =====
+# Shared by all web processes; backs the cached_db session engine
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL'),
+    }
+}
 
 # ===== LOGGING =====
 LOGGING = {
@@ -95,5 +118,3 @@ LOGGING = {
         'level': 'INFO',
     },
 }
-
-print("✅ Production settings loaded!")
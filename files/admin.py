@@ -11,6 +11,10 @@ class FileEncryptionKeyInline(admin.TabularInline):
     extra = 0
     readonly_fields = ['user', 'created_at']
     can_delete = True
+    
+    def get_queryset(self, request):
+        """Fetch each key's user in the same query"""
+        return super().get_queryset(request).select_related('user')
 
 
 @admin.register(EncryptedFile)
@@ -20,14 +24,14 @@ class EncryptedFileAdmin(admin.ModelAdmin):
     list_display = ['filename', 'uploaded_by', 'group', 'get_size_display', 'uploaded_at']
     list_filter = ['group', 'uploaded_at']
     search_fields = ['filename', 'uploaded_by__username', 'group__name']
-    readonly_fields = ['id', 'uploaded_at', 'file_size', 'nonce', 'tag']
+    readonly_fields = ['id', 'uploaded_at', 'file_size', 'aead_alg', 'nonce', 'tag', 'plaintext_sha256']
     
     fieldsets = (
         ('File Information', {
             'fields': ('id', 'filename', 'file', 'file_size', 'uploaded_by', 'group')
         }),
         ('Encryption Data', {
-            'fields': ('nonce', 'tag'),
+            'fields': ('aead_alg', 'nonce', 'tag', 'plaintext_sha256'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -37,6 +41,10 @@ class EncryptedFileAdmin(admin.ModelAdmin):
     
     inlines = [FileEncryptionKeyInline]
     
+    def get_queryset(self, request):
+        """Fetch uploader and group in the same query (avoids N+1)"""
+        return super().get_queryset(request).select_related('uploaded_by', 'group')
+    
     def has_add_permission(self, request):
         """Disable manual file addition (must go through upload view)"""
         return False
@@ -51,6 +59,10 @@ class FileEncryptionKeyAdmin(admin.ModelAdmin):
     search_fields = ['file__filename', 'user__username']
     readonly_fields = ['file', 'user', 'encrypted_aes_key', 'created_at']
     
+    def get_queryset(self, request):
+        """Fetch file and user in the same query (avoids N+1)"""
+        return super().get_queryset(request).select_related('file', 'user')
+    
     def has_add_permission(self, request):
         """Disable manual key addition"""
         return False
@@ -1,6 +1,24 @@
+import logging
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class FilesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'files'
+    
+    def ready(self):
+        """Log which OpenSSL build and AEAD the encryption code will use"""
+        from cryptography.hazmat.backends.openssl.backend import backend
+        from .encryption import DEFAULT_AEAD, HAS_AESNI
+        
+        logger.info(
+            'Using %s; default AEAD for new uploads: %s',
+            backend.openssl_version_text(), DEFAULT_AEAD
+        )
+        if not HAS_AESNI:
+            logger.warning(
+                'Hardware AES unavailable (or disabled via OPENSSL_ia32cap); '
+                'AES runs in software, new uploads use ChaCha20-Poly1305'
+            )
@@ -1,25 +1,305 @@
 """
 CryptFyles Hybrid Encryption System
-RSA-2048 + AES-256-GCM for secure file storage
+RSA-2048 or X25519 + AES-256-GCM (or ChaCha20-Poly1305) for secure file storage
 """
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey, X25519PublicKey
+)
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.keywrap import aes_key_wrap, aes_key_unwrap
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import os
-import base64
+import hashlib
+import threading
+
+
+# Read size used when streaming files through AES-GCM (1 MiB)
+STREAM_CHUNK_SIZE = 1 << 20
+
+# Raw X25519 public key length in bytes
+X25519_KEY_SIZE = 32
+
+# HKDF context for deriving X25519 key-wrapping keys
+X25519_WRAP_INFO = b'cryptfyles x25519 aes-kw v1'
+
+# File AEAD identifiers (stored in EncryptedFile.aead_alg)
+# - aes-gcm: one AES-256-GCM stream over the whole file, tag stored separately
+#   (legacy; still decrypted)
+# - aes-gcm-chunked: chunked AES-256-GCM, each chunk sealed with its own tag
+# - chacha20: chunked ChaCha20-Poly1305, each chunk sealed with its own tag
+AEAD_AES_GCM = 'aes-gcm'
+AEAD_AES_GCM_CHUNKED = 'aes-gcm-chunked'
+AEAD_CHACHA20 = 'chacha20'
+
+# Chunked AEAD nonce layout: prefix (7) + chunk counter (4) + last flag (1)
+CHUNK_NONCE_PREFIX_SIZE = 7
+CHUNK_TAG_SIZE = 16
+
+
+# Bit of OpenSSL's x86 capability vector that advertises AES-NI
+OPENSSL_IA32CAP_AESNI = 1 << 57
+
+
+def _openssl_aesni_masked():
+    """
+    Check whether OPENSSL_ia32cap hides AES-NI from OpenSSL
+    
+    The variable is either a capability vector ('0x...') or a mask of
+    bits to clear ('~0x...'); only the first 64-bit word matters here.
+    """
+    ia32cap = os.environ.get('OPENSSL_ia32cap', '').split(':', 1)[0].strip()
+    if not ia32cap:
+        return False
+    
+    clear = ia32cap.startswith('~')
+    try:
+        value = int(ia32cap.lstrip('~'), 0)
+    except ValueError:
+        return False
+    
+    if clear:
+        return bool(value & OPENSSL_IA32CAP_AESNI)
+    return not value & OPENSSL_IA32CAP_AESNI
+
+
+def _cpu_has_aes():
+    """
+    Best-effort check for hardware AES (x86 AES-NI / ARMv8 crypto extensions)
+    
+    Assumes hardware AES when /proc/cpuinfo is unavailable (non-Linux dev
+    machines), which keeps the previous AES-GCM behaviour there. Returns
+    False when OPENSSL_ia32cap stops OpenSSL from using AES-NI.
+    """
+    if _openssl_aesni_masked():
+        return False
+    
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith(('flags', 'Features')):
+                    return 'aes' in line.split(':', 1)[1].split()
+    except OSError:
+        pass
+    return True
+
+
+# Detected once at import: without hardware AES, ChaCha20-Poly1305 is
+# several times faster than software AES-GCM. Both are chunked, so every
+# downloaded chunk is authenticated before it is released.
+HAS_AESNI = _cpu_has_aes()
+DEFAULT_AEAD = AEAD_AES_GCM_CHUNKED if HAS_AESNI else AEAD_CHACHA20
+
+
+# Buffered randomness for nonces only (public values). Keys always come
+# straight from os.urandom.
+NONCE_POOL_SIZE = 4096
+_nonce_pool = b''
+_nonce_pool_pos = 0
+_nonce_pool_lock = threading.Lock()
+
+
+def _reset_nonce_pool():
+    """Discard buffered randomness so forked workers never share it"""
+    global _nonce_pool, _nonce_pool_pos
+    _nonce_pool = b''
+    _nonce_pool_pos = 0
+
+
+os.register_at_fork(after_in_child=_reset_nonce_pool)
+
+
+def _rand(n):
+    """
+    Return n random bytes for a nonce, refilling the pool with one
+    os.urandom call when it runs out
+    
+    Args:
+        n (int): Number of bytes (at most NONCE_POOL_SIZE)
+        
+    Returns:
+        bytes: Random bytes, never handed out twice
+    """
+    global _nonce_pool, _nonce_pool_pos
+    with _nonce_pool_lock:
+        if _nonce_pool_pos + n > len(_nonce_pool):
+            _nonce_pool = os.urandom(NONCE_POOL_SIZE)
+            _nonce_pool_pos = 0
+        start = _nonce_pool_pos
+        _nonce_pool_pos += n
+        return _nonce_pool[start:_nonce_pool_pos]
+
+
+# Groups larger than this wrap member keys on a thread pool (OpenSSL
+# releases the GIL during the public-key operations)
+PARALLEL_WRAP_THRESHOLD = 4
+
+
+@lru_cache(maxsize=None)
+def _get_wrap_executor():
+    """Shared thread pool for per-member key wrapping, created on first use"""
+    return ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix='key-wrap')
+
+
+# Pool threads do not survive fork; let children build their own
+os.register_at_fork(after_in_child=_get_wrap_executor.cache_clear)
+
+
+@lru_cache(maxsize=1024)
+def load_public_key(public_key_pem):
+    """Parse a PEM public key once per process (cached on the PEM bytes)"""
+    return serialization.load_pem_public_key(
+        public_key_pem,
+        backend=default_backend()
+    )
+
+
+@lru_cache(maxsize=1024)
+def load_public_key_der(public_key_der):
+    """Parse a DER (SubjectPublicKeyInfo) public key once per process"""
+    return serialization.load_der_public_key(
+        public_key_der,
+        backend=default_backend()
+    )
+
+
+def public_key_pem_to_der(public_key_pem):
+    """
+    Convert a PEM public key to DER (SubjectPublicKeyInfo)
+    
+    Args:
+        public_key_pem (bytes): Public key in PEM format
+        
+    Returns:
+        bytes: Same key in DER format
+    """
+    return load_public_key(public_key_pem).public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+
+def _derive_wrap_key(shared_secret, ephemeral_public, recipient_public):
+    """Derive an AES-256 key-wrapping key from an X25519 shared secret"""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=X25519_WRAP_INFO + ephemeral_public + recipient_public,
+        backend=default_backend()
+    ).derive(shared_secret)
+
+
+def _x25519_wrap(aes_key, public_key, ephemeral_key=None):
+    """
+    Wrap an AES key for an X25519 public key
+    
+    Ephemeral X25519 + HKDF-SHA256 -> AES key wrap (RFC 3394). One ephemeral
+    key may be shared by all recipients of the same AES key: each wrap key
+    is still unique because HKDF binds the recipient's public key.
+    
+    Args:
+        aes_key (bytes): 32-byte AES key
+        public_key (X25519PublicKey): Recipient public key
+        ephemeral_key (X25519PrivateKey): Ephemeral key for this batch
+            (generated if omitted)
+    
+    Returns:
+        bytes: ephemeral public key (32 bytes) + wrapped key (40 bytes)
+    """
+    if ephemeral_key is None:
+        ephemeral_key = X25519PrivateKey.generate()
+    ephemeral_public = ephemeral_key.public_key().public_bytes_raw()
+    wrap_key = _derive_wrap_key(
+        ephemeral_key.exchange(public_key),
+        ephemeral_public,
+        public_key.public_bytes_raw()
+    )
+    return ephemeral_public + aes_key_wrap(wrap_key, aes_key)
+
+
+def _x25519_unwrap(encrypted_aes_key, private_key):
+    """Reverse _x25519_wrap with the recipient's X25519 private key"""
+    ephemeral_public = encrypted_aes_key[:X25519_KEY_SIZE]
+    wrap_key = _derive_wrap_key(
+        private_key.exchange(X25519PublicKey.from_public_bytes(ephemeral_public)),
+        ephemeral_public,
+        private_key.public_key().public_bytes_raw()
+    )
+    return aes_key_unwrap(wrap_key, encrypted_aes_key[X25519_KEY_SIZE:])
+
+
+def _readinto(in_fileobj, buffer):
+    """
+    Fill a preallocated buffer from a file-like object
+    
+    Falls back to read() for file objects without readinto().
+    
+    Returns:
+        int: Number of bytes read (0 at end of file)
+    """
+    readinto = getattr(in_fileobj, 'readinto', None)
+    if readinto is not None:
+        return readinto(buffer) or 0
+    data = in_fileobj.read(len(buffer))
+    buffer[:len(data)] = data
+    return len(data)
+
+
+def _chunk_nonce(nonce_prefix, counter, last):
+    """Build the 12-byte nonce for one chunk of a chunked AEAD stream"""
+    return nonce_prefix + counter.to_bytes(4, 'big') + (b'\x01' if last else b'\x00')
+
+
+def _read_chunks(in_fileobj, size):
+    """Yield (chunk, is_last) pairs, reading one chunk ahead"""
+    chunk = in_fileobj.read(size)
+    while True:
+        next_chunk = in_fileobj.read(size)
+        yield chunk, not next_chunk
+        if not next_chunk:
+            return
+        chunk = next_chunk
+
+
+def _get_aead(aead_alg, key):
+    """Build the one-shot AEAD object for a chunked file AEAD identifier"""
+    if aead_alg == AEAD_AES_GCM_CHUNKED:
+        return AESGCM(key)
+    if aead_alg == AEAD_CHACHA20:
+        return ChaCha20Poly1305(key)
+    raise ValueError(f'Unsupported chunked AEAD: {aead_alg}')
+
+
+def _oaep_padding():
+    """RSA-OAEP (SHA-256) padding used for every RSA key wrap"""
+    return padding.OAEP(
+        mgf=padding.MGF1(algorithm=hashes.SHA256()),
+        algorithm=hashes.SHA256(),
+        label=None
+    )
+
+
+def _wrap_aes_key(aes_key, public_key, pad, ephemeral_key=None):
+    """Wrap an AES key for a parsed RSA or X25519 public key"""
+    if isinstance(public_key, X25519PublicKey):
+        return _x25519_wrap(aes_key, public_key, ephemeral_key)
+    return public_key.encrypt(aes_key, pad)
 
 
 class HybridEncryption:
     """
-    Complete RSA-AES hybrid encryption system
+    Complete RSA/X25519-AES hybrid encryption system
     
     Flow:
     1. Generate random AES-256 key
     2. Encrypt file with AES-256-GCM (fast for large files)
-    3. Encrypt AES key with RSA-2048 (secure key distribution)
+    3. Encrypt AES key with RSA-2048 or X25519 (secure key distribution)
     4. Store encrypted file + encrypted AES key + nonce + tag
     """
     
@@ -56,6 +336,34 @@ class HybridEncryption:
         
         return private_pem, public_pem
     
+    @staticmethod
+    def generate_x25519_key_pair():
+        """
+        Generate X25519 key pair
+        
+        Much cheaper to generate than RSA-2048 and accepted everywhere an
+        RSA key is (see encrypt_aes_key_with_rsa).
+        
+        Returns:
+            tuple: (private_key_pem, public_key_pem) as bytes
+        """
+        private_key = X25519PrivateKey.generate()
+        
+        # Serialize private key to PEM format
+        private_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        
+        # Serialize public key to PEM format
+        public_pem = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        
+        return private_pem, public_pem
+    
     @staticmethod
     def generate_aes_key():
         """
@@ -64,216 +372,265 @@ class HybridEncryption:
         Returns:
             bytes: 32-byte AES key
         """
+        # Keys never come from the buffered nonce pool
         return os.urandom(32)
     
     @staticmethod
-    def encrypt_file_aes(file_data, aes_key):
+    def encrypt_file_stream(in_fileobj, out_fileobj, aes_key):
         """
-        Encrypt file data with AES-256-GCM
+        Encrypt a file-like object with AES-256-GCM, chunk by chunk
+        
+        Memory use is bounded by STREAM_CHUNK_SIZE instead of the file size:
+        one input and one output buffer are allocated up front and reused
+        for every chunk. The plaintext SHA-256 is computed in the same pass.
         
         Args:
-            file_data (bytes): File content to encrypt
+            in_fileobj: Readable binary file-like object (plaintext)
+            out_fileobj: Writable binary file-like object (ciphertext)
             aes_key (bytes): 32-byte AES key
             
         Returns:
-            dict: {
-                'ciphertext': encrypted data,
-                'nonce': 12-byte nonce,
-                'tag': 16-byte authentication tag
-            }
+            tuple: (nonce, tag, plaintext_sha256) as bytes
         """
         # Generate random nonce (12 bytes for GCM)
-        nonce = os.urandom(12)
+        nonce = _rand(12)
         
-        # Create AES-GCM cipher
-        cipher = Cipher(
+        encryptor = Cipher(
             algorithms.AES(aes_key),
             modes.GCM(nonce),
             backend=default_backend()
-        )
-        encryptor = cipher.encryptor()
+        ).encryptor()
+        digest = hashlib.sha256()
         
-        # Encrypt the file
-        ciphertext = encryptor.update(file_data) + encryptor.finalize()
+        # update_into needs room for one extra block minus a byte
+        in_buffer = memoryview(bytearray(STREAM_CHUNK_SIZE))
+        out_buffer = memoryview(bytearray(STREAM_CHUNK_SIZE + 15))
         
-        # Get authentication tag
-        tag = encryptor.tag
+        while True:
+            size = _readinto(in_fileobj, in_buffer)
+            if not size:
+                break
+            digest.update(in_buffer[:size])
+            written = encryptor.update_into(in_buffer[:size], out_buffer)
+            out_fileobj.write(out_buffer[:written])
+        out_fileobj.write(encryptor.finalize())
         
-        return {
-            'ciphertext': ciphertext,
-            'nonce': nonce,
-            'tag': tag
-        }
+        return nonce, encryptor.tag, digest.digest()
     
     @staticmethod
-    def decrypt_file_aes(ciphertext, aes_key, nonce, tag):
+    def iter_decrypt_file_stream(in_fileobj, aes_key, nonce, tag):
         """
-        Decrypt file data with AES-256-GCM
+        Decrypt a file-like object with AES-256-GCM, yielding plaintext chunks
+        
+        The last chunk is held back until the tag has been verified, so a
+        tampered file always fails before its final bytes are released and a
+        client reading a known length sees a truncated body.
         
         Args:
-            ciphertext (bytes): Encrypted file data
+            in_fileobj: Readable binary file-like object (ciphertext)
             aes_key (bytes): 32-byte AES key
             nonce (bytes): 12-byte nonce
             tag (bytes): 16-byte authentication tag
             
-        Returns:
-            bytes: Decrypted file data
+        Yields:
+            bytes: Decrypted file data, chunk by chunk
             
         Raises:
-            Exception: If authentication fails (file was tampered with)
+            InvalidTag: If authentication fails (file was tampered with)
         """
-        # Create AES-GCM cipher
-        cipher = Cipher(
+        decryptor = Cipher(
             algorithms.AES(aes_key),
             modes.GCM(nonce, tag),
             backend=default_backend()
-        )
-        decryptor = cipher.decryptor()
+        ).decryptor()
         
-        # Decrypt the file
-        plaintext = decryptor.update(ciphertext) + decryptor.finalize()
+        # Ciphertext is read into one reused buffer; the plaintext chunks
+        # are handed to the caller, so each needs its own bytes object
+        in_buffer = memoryview(bytearray(STREAM_CHUNK_SIZE))
         
-        return plaintext
+        pending = b''
+        while True:
+            size = _readinto(in_fileobj, in_buffer)
+            if not size:
+                break
+            if pending:
+                yield pending
+            pending = decryptor.update(in_buffer[:size])
+        pending += decryptor.finalize()
+        
+        if pending:
+            yield pending
     
     @staticmethod
-    def encrypt_aes_key_with_rsa(aes_key, public_key_pem):
+    def encrypt_file_chunked(in_fileobj, out_fileobj, aes_key, aead_alg=AEAD_CHACHA20):
         """
-        Encrypt AES key with RSA public key
+        Encrypt a file-like object as a sequence of independently sealed chunks
+        
+        On disk: chunk0 ciphertext + tag, chunk1 ciphertext + tag, ... Each
+        STREAM_CHUNK_SIZE chunk is sealed with a nonce built from a random
+        prefix, the chunk counter and a last-chunk flag, so chunks cannot be
+        reordered, dropped or truncated without failing authentication, and
+        each chunk can be verified and released on its own while streaming.
         
         Args:
-            aes_key (bytes): 32-byte AES key
-            public_key_pem (bytes): RSA public key in PEM format
+            in_fileobj: Readable binary file-like object (plaintext)
+            out_fileobj: Writable binary file-like object (ciphertext)
+            aes_key (bytes): 32-byte key
+            aead_alg (str): AEAD identifier
             
         Returns:
-            bytes: Encrypted AES key (256 bytes for RSA-2048)
+            tuple: (nonce_prefix, plaintext_sha256) as bytes
         """
-        # Load public key
-        public_key = serialization.load_pem_public_key(
-            public_key_pem,
-            backend=default_backend()
-        )
+        aead = _get_aead(aead_alg, aes_key)
+        nonce_prefix = _rand(CHUNK_NONCE_PREFIX_SIZE)
+        digest = hashlib.sha256()
         
-        # Encrypt AES key with RSA-OAEP
-        encrypted_aes_key = public_key.encrypt(
-            aes_key,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
+        for counter, (chunk, last) in enumerate(_read_chunks(in_fileobj, STREAM_CHUNK_SIZE)):
+            digest.update(chunk)
+            out_fileobj.write(
+                aead.encrypt(_chunk_nonce(nonce_prefix, counter, last), chunk, None)
             )
-        )
         
-        return encrypted_aes_key
+        return nonce_prefix, digest.digest()
     
     @staticmethod
-    def decrypt_aes_key_with_rsa(encrypted_aes_key, private_key_pem):
+    def iter_decrypt_file_chunked(in_fileobj, aes_key, nonce_prefix, aead_alg=AEAD_CHACHA20):
         """
-        Decrypt AES key with RSA private key
+        Decrypt a chunked AEAD stream, yielding authenticated plaintext chunks
         
         Args:
-            encrypted_aes_key (bytes): Encrypted AES key
-            private_key_pem (bytes): RSA private key in PEM format
+            in_fileobj: Readable binary file-like object (ciphertext)
+            aes_key (bytes): 32-byte key
+            nonce_prefix (bytes): Prefix returned by encrypt_file_chunked
+            aead_alg (str): AEAD identifier
             
-        Returns:
-            bytes: Decrypted AES key (32 bytes)
+        Yields:
+            bytes: Decrypted file data, chunk by chunk
+            
+        Raises:
+            InvalidTag: If any chunk fails authentication
         """
-        # Load private key
-        private_key = serialization.load_pem_private_key(
-            private_key_pem,
-            password=None,
-            backend=default_backend()
-        )
+        aead = _get_aead(aead_alg, aes_key)
+        sealed_size = STREAM_CHUNK_SIZE + CHUNK_TAG_SIZE
         
-        # Decrypt AES key with RSA-OAEP
-        aes_key = private_key.decrypt(
-            encrypted_aes_key,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
+        for counter, (chunk, last) in enumerate(_read_chunks(in_fileobj, sealed_size)):
+            yield aead.decrypt(_chunk_nonce(nonce_prefix, counter, last), chunk, None)
+    
+    @staticmethod
+    def encrypt_file(in_fileobj, out_fileobj, aes_key, aead_alg=DEFAULT_AEAD):
+        """
+        Encrypt a file-like object with the given file AEAD
+        
+        Returns:
+            tuple: (nonce, tag, plaintext_sha256) as bytes; tag is empty for
+            chunked AEADs
+        """
+        if aead_alg == AEAD_AES_GCM:
+            return HybridEncryption.encrypt_file_stream(in_fileobj, out_fileobj, aes_key)
+        nonce_prefix, plaintext_sha256 = HybridEncryption.encrypt_file_chunked(
+            in_fileobj, out_fileobj, aes_key, aead_alg
         )
+        return nonce_prefix, b'', plaintext_sha256
+    
+    @staticmethod
+    def iter_decrypt_file(in_fileobj, aes_key, nonce, tag, aead_alg=AEAD_AES_GCM):
+        """
+        Decrypt a file-like object stored with the given file AEAD
         
-        return aes_key
+        Yields:
+            bytes: Decrypted file data, chunk by chunk
+        """
+        if aead_alg == AEAD_AES_GCM:
+            return HybridEncryption.iter_decrypt_file_stream(in_fileobj, aes_key, nonce, tag)
+        return HybridEncryption.iter_decrypt_file_chunked(in_fileobj, aes_key, nonce, aead_alg)
     
     @staticmethod
-    def encrypt_file_hybrid(file_data, public_key_pem):
+    def encrypt_aes_key_with_rsa(aes_key, public_key_pem):
         """
-        Encrypt file using hybrid encryption (AES + RSA)
+        Encrypt AES key with a user's public key
         
-        Process:
-        1. Generate random AES key
-        2. Encrypt file with AES-GCM
-        3. Encrypt AES key with RSA
+        RSA keys use RSA-OAEP; X25519 keys use ephemeral X25519 + HKDF-SHA256
+        + AES key wrap. The name is kept for existing callers.
         
         Args:
-            file_data (bytes): File content to encrypt
-            public_key_pem (bytes): RSA public key
+            aes_key (bytes): 32-byte AES key
+            public_key_pem (bytes): RSA or X25519 public key in PEM format
             
         Returns:
-            dict: {
-                'ciphertext': encrypted file,
-                'encrypted_aes_key': encrypted AES key,
-                'nonce': nonce,
-                'tag': authentication tag
-            }
+            bytes: Encrypted AES key (256 bytes for RSA-2048, 72 for X25519)
         """
-        # Generate random AES key
-        aes_key = HybridEncryption.generate_aes_key()
-        
-        # Encrypt file with AES
-        encrypted_data = HybridEncryption.encrypt_file_aes(file_data, aes_key)
+        # Load public key (parsed once per process)
+        public_key = load_public_key(public_key_pem)
         
-        # Encrypt AES key with RSA
-        encrypted_aes_key = HybridEncryption.encrypt_aes_key_with_rsa(
-            aes_key, public_key_pem
-        )
-        
-        return {
-            'ciphertext': encrypted_data['ciphertext'],
-            'encrypted_aes_key': encrypted_aes_key,
-            'nonce': encrypted_data['nonce'],
-            'tag': encrypted_data['tag']
-        }
+        return _wrap_aes_key(aes_key, public_key, _oaep_padding())
     
     @staticmethod
-    def decrypt_file_hybrid(ciphertext, encrypted_aes_key, nonce, tag, private_key_pem):
+    def decrypt_aes_key_with_rsa(encrypted_aes_key, private_key_pem):
         """
-        Decrypt file using hybrid encryption (RSA + AES)
-        
-        Process:
-        1. Decrypt AES key with RSA
-        2. Decrypt file with AES-GCM
+        Decrypt AES key with a user's private key
         
         Args:
-            ciphertext (bytes): Encrypted file
             encrypted_aes_key (bytes): Encrypted AES key
-            nonce (bytes): Nonce
-            tag (bytes): Authentication tag
-            private_key_pem (bytes): RSA private key
+            private_key_pem: RSA or X25519 private key as PEM bytes, or an
+                already-parsed key object
             
         Returns:
-            bytes: Decrypted file data
+            bytes: Decrypted AES key (32 bytes)
         """
-        # Decrypt AES key with RSA
-        aes_key = HybridEncryption.decrypt_aes_key_with_rsa(
-            encrypted_aes_key, private_key_pem
-        )
+        # Load private key
+        if isinstance(private_key_pem, bytes):
+            private_key = serialization.load_pem_private_key(
+                private_key_pem,
+                password=None,
+                backend=default_backend()
+            )
+        else:
+            private_key = private_key_pem
         
-        # Decrypt file with AES
-        plaintext = HybridEncryption.decrypt_file_aes(
-            ciphertext, aes_key, nonce, tag
-        )
+        if isinstance(private_key, X25519PrivateKey):
+            return _x25519_unwrap(encrypted_aes_key, private_key)
         
-        return plaintext
-
-
-# Helper functions for database storage
-def encode_for_db(data):
-    """Convert bytes to base64 string for database storage"""
-    return base64.b64encode(data).decode('utf-8')
+        # Decrypt AES key with RSA-OAEP
+        aes_key = private_key.decrypt(encrypted_aes_key, _oaep_padding())
+        
+        return aes_key
 
 
-def decode_from_db(data_str):
-    """Convert base64 string back to bytes"""
-    return base64.b64decode(data_str.encode('utf-8'))
+def wrap_aes_key_for_users(aes_key, recipients):
+    """
+    Encrypt one AES key for many users (RSA-OAEP or X25519)
+    
+    Each public key is parsed once (cached); the OAEP padding object and the
+    X25519 ephemeral key are built once for the whole batch, so X25519
+    recipients cost one exchange + HKDF + key wrap each. Batches above
+    PARALLEL_WRAP_THRESHOLD are spread over a thread pool on multi-core
+    hosts.
+    
+    Args:
+        aes_key (bytes): 32-byte AES key
+        recipients: Iterable of (user, public_key) tuples, where public_key
+            is PEM bytes or an already-parsed key object
+        
+    Returns:
+        list: (user, encrypted_aes_key) tuples, ready for bulk_create
+    """
+    pad = _oaep_padding()
+    ephemeral_key = X25519PrivateKey.generate()
+    
+    users = []
+    public_keys = []
+    for user, public_key in recipients:
+        if isinstance(public_key, bytes):
+            public_key = load_public_key(public_key)
+        users.append(user)
+        public_keys.append(public_key)
+    
+    def wrap(public_key):
+        return _wrap_aes_key(aes_key, public_key, pad, ephemeral_key)
+    
+    if len(public_keys) > PARALLEL_WRAP_THRESHOLD and (os.cpu_count() or 1) > 1:
+        wrapped = _get_wrap_executor().map(wrap, public_keys)
+    else:
+        wrapped = map(wrap, public_keys)
+    
+    return list(zip(users, wrapped))
@@ -0,0 +1,22 @@
+"""
+Delete uploads whose background encryption never finished
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from files.tasks import sweep_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete stale PENDING uploads and leftover staged plaintext'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=settings.UPLOAD_STALE_AFTER,
+            help='Age in seconds after which an unfinished upload is stale'
+        )
+    
+    def handle(self, *args, **options):
+        records, staged = sweep_stale_uploads(options['max_age'])
+        self.stdout.write(f'Removed {records} stale uploads and {staged} staged files.')
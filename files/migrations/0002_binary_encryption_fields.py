@@ -0,0 +1,119 @@
+# Generated by Django 5.1.15 on 2026-10-15 10:12
+
+import base64
+
+from django.db import migrations, models
+
+
+def base64_to_bytes(apps, schema_editor):
+    """Decode existing base64 strings into the new binary columns"""
+    EncryptedFile = apps.get_model('files', 'EncryptedFile')
+    FileEncryptionKey = apps.get_model('files', 'FileEncryptionKey')
+
+    for encrypted_file in EncryptedFile.objects.only('nonce', 'tag').iterator():
+        encrypted_file.nonce_bin = base64.b64decode(encrypted_file.nonce)
+        encrypted_file.tag_bin = base64.b64decode(encrypted_file.tag)
+        encrypted_file.save(update_fields=['nonce_bin', 'tag_bin'])
+
+    for file_key in FileEncryptionKey.objects.only('encrypted_aes_key').iterator():
+        file_key.encrypted_aes_key_bin = base64.b64decode(file_key.encrypted_aes_key)
+        file_key.save(update_fields=['encrypted_aes_key_bin'])
+
+
+def bytes_to_base64(apps, schema_editor):
+    """Encode binary columns back into base64 strings"""
+    EncryptedFile = apps.get_model('files', 'EncryptedFile')
+    FileEncryptionKey = apps.get_model('files', 'FileEncryptionKey')
+
+    for encrypted_file in EncryptedFile.objects.only('nonce_bin', 'tag_bin').iterator():
+        encrypted_file.nonce = base64.b64encode(encrypted_file.nonce_bin).decode('utf-8')
+        encrypted_file.tag = base64.b64encode(encrypted_file.tag_bin).decode('utf-8')
+        encrypted_file.save(update_fields=['nonce', 'tag'])
+
+    for file_key in FileEncryptionKey.objects.only('encrypted_aes_key_bin').iterator():
+        file_key.encrypted_aes_key = base64.b64encode(file_key.encrypted_aes_key_bin).decode('utf-8')
+        file_key.save(update_fields=['encrypted_aes_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encryptedfile',
+            name='nonce_bin',
+            field=models.BinaryField(default=b'', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='encryptedfile',
+            name='tag_bin',
+            field=models.BinaryField(default=b'', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='fileencryptionkey',
+            name='encrypted_aes_key_bin',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(base64_to_bytes, bytes_to_base64),
+        # Defaults let RemoveField be reversed on tables that already have rows
+        migrations.AlterField(
+            model_name='encryptedfile',
+            name='nonce',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='encryptedfile',
+            name='tag',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='fileencryptionkey',
+            name='encrypted_aes_key',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='encryptedfile',
+            name='nonce',
+        ),
+        migrations.RemoveField(
+            model_name='encryptedfile',
+            name='tag',
+        ),
+        migrations.RemoveField(
+            model_name='fileencryptionkey',
+            name='encrypted_aes_key',
+        ),
+        migrations.RenameField(
+            model_name='encryptedfile',
+            old_name='nonce_bin',
+            new_name='nonce',
+        ),
+        migrations.RenameField(
+            model_name='encryptedfile',
+            old_name='tag_bin',
+            new_name='tag',
+        ),
+        migrations.RenameField(
+            model_name='fileencryptionkey',
+            old_name='encrypted_aes_key_bin',
+            new_name='encrypted_aes_key',
+        ),
+        migrations.AlterField(
+            model_name='encryptedfile',
+            name='nonce',
+            field=models.BinaryField(help_text='AES-GCM nonce (raw bytes)', max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='encryptedfile',
+            name='tag',
+            field=models.BinaryField(help_text='AES-GCM authentication tag (raw bytes)', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='fileencryptionkey',
+            name='encrypted_aes_key',
+            field=models.BinaryField(help_text="AES key encrypted with user's RSA public key (raw bytes)"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-15 21:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0002_binary_encryption_fields'),
+        ('groups', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='encryptedfile',
+            index=models.Index(fields=['group', '-uploaded_at'], name='files_encry_group_i_c49b62_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='encryptedfile',
+            index=models.Index(fields=['uploaded_by', '-uploaded_at'], name='files_encry_uploade_e38e65_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileencryptionkey',
+            index=models.Index(fields=['user', 'file'], name='files_filee_user_id_3b3210_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-15 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0003_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encryptedfile',
+            name='aead_alg',
+            field=models.CharField(choices=[('aes-gcm', 'AES-256-GCM'), ('chacha20', 'ChaCha20-Poly1305 (chunked)')], default='aes-gcm', help_text='AEAD used to encrypt the file data', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='encryptedfile',
+            name='nonce',
+            field=models.BinaryField(help_text='AES-GCM nonce, or chunk nonce prefix for chunked AEADs (raw bytes)', max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='encryptedfile',
+            name='tag',
+            field=models.BinaryField(help_text='AES-GCM authentication tag; empty for chunked AEADs (raw bytes)', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-15 21:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0004_encryptedfile_aead_alg'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encryptedfile',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Encrypting'), ('ready', 'Ready')], default='ready', help_text='Whether background encryption has finished', max_length=16),
+        ),
+    ]
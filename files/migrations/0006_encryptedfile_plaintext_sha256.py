@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-15 21:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0005_encryptedfile_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encryptedfile',
+            name='plaintext_sha256',
+            field=models.BinaryField(blank=True, help_text='SHA-256 of the original file, computed while encrypting (raw bytes)', max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-15 21:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0006_encryptedfile_plaintext_sha256'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='fileencryptionkey',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='fileencryptionkey',
+            constraint=models.UniqueConstraint(fields=('file', 'user'), name='uniq_file_user'),
+        ),
+    ]
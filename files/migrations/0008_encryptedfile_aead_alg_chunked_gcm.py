@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-15 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0007_fileencryptionkey_uniq_file_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='encryptedfile',
+            name='aead_alg',
+            field=models.CharField(choices=[('aes-gcm', 'AES-256-GCM'), ('aes-gcm-chunked', 'AES-256-GCM (chunked)'), ('chacha20', 'ChaCha20-Poly1305 (chunked)')], default='aes-gcm', help_text='AEAD used to encrypt the file data', max_length=16),
+        ),
+    ]
@@ -2,9 +2,34 @@
 Encrypted File Models
 """
 import uuid
-from django.db import models
+from django.db import connection, models
 from django.conf import settings
+from django.utils import timezone
 from groups.models import FileGroup
+from .encryption import AEAD_AES_GCM, AEAD_AES_GCM_CHUNKED, AEAD_CHACHA20
+
+
+# Units for EncryptedFile.get_size_display (powers of 1024)
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# Upload processing states; files only become visible once READY
+STATUS_PENDING = 'pending'
+STATUS_READY = 'ready'
+
+STATUS_CHOICES = [
+    (STATUS_PENDING, 'Encrypting'),
+    (STATUS_READY, 'Ready'),
+]
+
+# Key rows per INSERT, and the group size above which PostgreSQL gets COPY
+KEY_BATCH_SIZE = 1000
+KEY_COPY_THRESHOLD = 200
+
+AEAD_CHOICES = [
+    (AEAD_AES_GCM, 'AES-256-GCM'),
+    (AEAD_AES_GCM_CHUNKED, 'AES-256-GCM (chunked)'),
+    (AEAD_CHACHA20, 'ChaCha20-Poly1305 (chunked)'),
+]
 
 
 class EncryptedFile(models.Model):
@@ -14,7 +39,7 @@ class EncryptedFile(models.Model):
     Stores:
     - Encrypted file data (on disk)
     - File metadata (name, size, uploader, group)
-    - GCM nonce and authentication tag
+    - AEAD algorithm, nonce and authentication tag
     
     Note: AES keys are stored separately in FileEncryptionKey
     """
@@ -42,15 +67,36 @@ class EncryptedFile(models.Model):
         help_text='Original file size in bytes (before encryption)'
     )
     
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_READY,
+        help_text='Whether background encryption has finished'
+    )
+    
     # Encryption metadata
-    nonce = models.CharField(
-        max_length=64,
-        help_text='AES-GCM nonce (base64 encoded)'
+    aead_alg = models.CharField(
+        max_length=16,
+        choices=AEAD_CHOICES,
+        default=AEAD_AES_GCM,
+        help_text='AEAD used to encrypt the file data'
+    )
+    
+    nonce = models.BinaryField(
+        max_length=12,
+        help_text='AES-GCM nonce, or chunk nonce prefix for chunked AEADs (raw bytes)'
     )
     
-    tag = models.CharField(
-        max_length=64,
-        help_text='AES-GCM authentication tag (base64 encoded)'
+    tag = models.BinaryField(
+        max_length=16,
+        help_text='AES-GCM authentication tag; empty for chunked AEADs (raw bytes)'
+    )
+    
+    plaintext_sha256 = models.BinaryField(
+        max_length=32,
+        null=True,
+        blank=True,
+        help_text='SHA-256 of the original file, computed while encrypting (raw bytes)'
     )
     
     # Relationships
@@ -77,18 +123,21 @@ class EncryptedFile(models.Model):
         ordering = ['-uploaded_at']
         verbose_name = 'Encrypted File'
         verbose_name_plural = 'Encrypted Files'
+        indexes = [
+            # "Files in this group / by this user, newest first"
+            models.Index(fields=['group', '-uploaded_at']),
+            models.Index(fields=['uploaded_by', '-uploaded_at']),
+        ]
     
     def __str__(self):
         return f"📄 {self.filename}"
     
     def get_size_display(self):
         """Return human-readable file size"""
-        size = self.file_size
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} TB"
+        size = self.file_size or 0
+        # Unit index from the bit length: one division, no loop
+        i = min((size.bit_length() - 1) // 10, len(SIZE_UNITS) - 1) if size else 0
+        return f"{size / (1 << (10 * i)):.1f} {SIZE_UNITS[i]}"
 
 
 class FileEncryptionKey(models.Model):
@@ -116,8 +165,8 @@ class FileEncryptionKey(models.Model):
         help_text='User who can decrypt this file'
     )
     
-    encrypted_aes_key = models.TextField(
-        help_text='AES key encrypted with user\'s RSA public key (base64)'
+    encrypted_aes_key = models.BinaryField(
+        help_text='AES key encrypted with user\'s RSA public key (raw bytes)'
     )
     
     created_at = models.DateTimeField(
@@ -125,9 +174,50 @@ class FileEncryptionKey(models.Model):
     )
     
     class Meta:
-        unique_together = ['file', 'user']
         verbose_name = 'File Encryption Key'
         verbose_name_plural = 'File Encryption Keys'
+        constraints = [
+            # One key per user per file; also the index behind the
+            # (file, user) lookup on every download
+            models.UniqueConstraint(fields=['file', 'user'], name='uniq_file_user'),
+        ]
+        indexes = [
+            # The unique index is (file, user); "files this user can open"
+            # needs the reverse order
+            models.Index(fields=['user', 'file']),
+        ]
     
     def __str__(self):
         return f"🔑 {self.file.filename} → {self.user.username}"
+    
+    @classmethod
+    def bulk_store(cls, encrypted_file, wrapped_keys):
+        """
+        Store one encrypted AES key row per member
+        
+        Uses batched INSERTs, or COPY FROM STDIN on PostgreSQL for groups
+        larger than KEY_COPY_THRESHOLD.
+        
+        Args:
+            encrypted_file (EncryptedFile): File the keys belong to
+            wrapped_keys (list): (user_id, encrypted_aes_key) pairs
+        """
+        if connection.vendor == 'postgresql' and len(wrapped_keys) > KEY_COPY_THRESHOLD:
+            created_at = timezone.now()
+            table = connection.ops.quote_name(cls._meta.db_table)
+            with connection.cursor() as cursor:
+                with cursor.copy(
+                    f'COPY {table} (file_id, user_id, encrypted_aes_key, created_at) FROM STDIN'
+                ) as copy:
+                    for user_id, encrypted_aes_key in wrapped_keys:
+                        copy.write_row((encrypted_file.pk, user_id, encrypted_aes_key, created_at))
+            return
+        
+        cls.objects.bulk_create([
+            cls(
+                file=encrypted_file,
+                user_id=user_id,
+                encrypted_aes_key=encrypted_aes_key
+            )
+            for user_id, encrypted_aes_key in wrapped_keys
+        ], batch_size=KEY_BATCH_SIZE)
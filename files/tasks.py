@@ -0,0 +1,185 @@
+"""
+Background File Encryption Tasks
+"""
+import logging
+import os
+import tempfile
+import time
+from contextlib import suppress
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+from users.models import CustomUser
+from .models import EncryptedFile, FileEncryptionKey, STATUS_PENDING, STATUS_READY
+from .encryption import DEFAULT_AEAD, HybridEncryption, wrap_aes_key_for_users
+
+logger = logging.getLogger(__name__)
+
+
+def _encrypt_to_storage(encrypted_file, plaintext, aes_key, aead_alg):
+    """
+    Encrypt plaintext into encrypted_file.file
+    
+    Local storage is written directly through the storage's file handle;
+    other backends get the ciphertext via a temp file and file.save().
+    
+    Returns:
+        tuple: (nonce, tag, plaintext_sha256) as bytes
+    """
+    storage = encrypted_file.file.storage
+    name = f'{encrypted_file.id}.enc'
+    
+    if isinstance(storage, FileSystemStorage):
+        # Set the name first so a failed write is cleaned up with the file
+        encrypted_file.file.name = encrypted_file.file.field.generate_filename(
+            encrypted_file, name
+        )
+        os.makedirs(os.path.dirname(storage.path(encrypted_file.file.name)), exist_ok=True)
+        with storage.open(encrypted_file.file.name, 'wb') as encrypted_out:
+            return HybridEncryption.encrypt_file(
+                plaintext, encrypted_out, aes_key, aead_alg
+            )
+    
+    with tempfile.TemporaryFile() as encrypted_tmp:
+        result = HybridEncryption.encrypt_file(
+            plaintext, encrypted_tmp, aes_key, aead_alg
+        )
+        encrypted_tmp.seek(0)
+        encrypted_file.file.save(name, File(encrypted_tmp), save=False)
+    return result
+
+
+def encrypt_file_for_group(encrypted_file, plaintext):
+    """
+    Encrypt an upload and wrap its key for every group member
+    
+    Process:
+    1. Generate random AES key
+    2. Encrypt file with the host's preferred AEAD straight into storage
+    3. Encrypt AES key for each group member with their public key
+    4. Mark the file READY
+    
+    Args:
+        encrypted_file (EncryptedFile): PENDING record created by the upload view
+        plaintext: Readable binary file-like object with the original data
+    
+    Returns:
+        int: Number of members the file was encrypted for
+    """
+    aes_key = HybridEncryption.generate_aes_key()
+    aead_alg = DEFAULT_AEAD
+    
+    nonce, tag, plaintext_sha256 = _encrypt_to_storage(
+        encrypted_file, plaintext, aes_key, aead_alg
+    )
+    encrypted_file.aead_alg = aead_alg
+    encrypted_file.nonce = nonce
+    encrypted_file.tag = tag
+    encrypted_file.plaintext_sha256 = plaintext_sha256
+    
+    # Parsed public keys come from the per-user cache
+    member_ids = list(encrypted_file.group.members.values_list('id', flat=True))
+    public_keys = CustomUser.get_public_key_objects(member_ids)
+    wrapped_keys = wrap_aes_key_for_users(aes_key, public_keys.items())
+    
+    # Key rows and the READY update commit together: one COMMIT per
+    # upload, and a file is never READY with only some keys stored
+    with transaction.atomic():
+        # Store every member's encrypted AES key (batched INSERT or COPY)
+        FileEncryptionKey.bulk_store(encrypted_file, wrapped_keys)
+        
+        encrypted_file.status = STATUS_READY
+        encrypted_file.save(update_fields=[
+            'file', 'aead_alg', 'nonce', 'tag', 'plaintext_sha256', 'status'
+        ])
+    
+    return len(member_ids)
+
+
+def discard_upload(encrypted_file):
+    """Delete a failed upload's record and any ciphertext already stored"""
+    if encrypted_file.file:
+        encrypted_file.file.delete(save=False)
+    encrypted_file.delete()
+
+
+@shared_task
+def encrypt_and_store(file_id, staged_path):
+    """
+    Encrypt a staged upload off the request path
+    
+    The staged plaintext is always removed afterwards. On failure the
+    PENDING record (and any stored ciphertext) is deleted so the upload
+    status endpoint reports it as failed.
+    
+    Args:
+        file_id (str): EncryptedFile primary key
+        staged_path (str): Path of the plaintext saved by the upload view
+    """
+    try:
+        try:
+            encrypted_file = EncryptedFile.objects.select_related('group').get(
+                pk=file_id, status=STATUS_PENDING
+            )
+        except EncryptedFile.DoesNotExist:
+            # Upload was deleted before the worker picked it up
+            return
+        
+        try:
+            with open(staged_path, 'rb') as plaintext:
+                encrypt_file_for_group(encrypted_file, plaintext)
+        except Exception:
+            logger.exception('Encryption failed for file %s', file_id)
+            discard_upload(encrypted_file)
+    finally:
+        # May already be gone if sweep_stale_uploads got here first
+        with suppress(FileNotFoundError):
+            os.remove(staged_path)
+
+
+@shared_task
+def sweep_stale_uploads(max_age=None):
+    """
+    Remove uploads whose encryption never finished
+    
+    Covers a task lost by the broker or a worker killed before
+    encrypt_and_store's cleanup ran: PENDING records (and any partial
+    ciphertext) and staged plaintext older than max_age are deleted.
+    Run periodically by Celery beat (CELERY_BEAT_SCHEDULE) or with
+    `manage.py sweep_uploads`.
+    
+    Args:
+        max_age (int): Age in seconds; defaults to UPLOAD_STALE_AFTER
+    
+    Returns:
+        tuple: (records removed, staged files removed)
+    """
+    if max_age is None:
+        max_age = settings.UPLOAD_STALE_AFTER
+    
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    stale_files = EncryptedFile.objects.filter(status=STATUS_PENDING, uploaded_at__lt=cutoff)
+    
+    records = 0
+    for encrypted_file in stale_files.iterator():
+        discard_upload(encrypted_file)
+        records += 1
+    
+    staged = 0
+    staging_root = settings.UPLOAD_STAGING_ROOT
+    if os.path.isdir(staging_root):
+        staged_cutoff = time.time() - max_age
+        with os.scandir(staging_root) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_mtime < staged_cutoff:
+                    with suppress(FileNotFoundError):
+                        os.remove(entry.path)
+                        staged += 1
+    
+    if records or staged:
+        logger.warning('Swept %d stale uploads and %d staged files', records, staged)
+    return records, staged
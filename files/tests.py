@@ -1,3 +1,245 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from cryptography.exceptions import InvalidTag
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from groups.models import FileGroup
+from users.models import CustomUser
+from . import encryption
+from .encryption import (
+    AEAD_AES_GCM, AEAD_AES_GCM_CHUNKED, AEAD_CHACHA20, CHUNK_TAG_SIZE,
+    PARALLEL_WRAP_THRESHOLD, STREAM_CHUNK_SIZE, HybridEncryption,
+    load_public_key, wrap_aes_key_for_users
+)
+from .models import EncryptedFile, STATUS_PENDING, STATUS_READY
+from .tasks import sweep_stale_uploads
+
+
+AEADS = (AEAD_AES_GCM, AEAD_AES_GCM_CHUNKED, AEAD_CHACHA20)
+CHUNKED_AEADS = (AEAD_AES_GCM_CHUNKED, AEAD_CHACHA20)
+
+# Empty, tiny, exactly one and two chunks, and a partial trailing chunk
+SIZES = (0, 1, STREAM_CHUNK_SIZE, 2 * STREAM_CHUNK_SIZE, 2 * STREAM_CHUNK_SIZE + 7)
+
+
+def _encrypt(data, aead_alg):
+    """Encrypt data, returning (key, nonce, tag, sha256, ciphertext)"""
+    aes_key = HybridEncryption.generate_aes_key()
+    out = io.BytesIO()
+    nonce, tag, sha256 = HybridEncryption.encrypt_file(io.BytesIO(data), out, aes_key, aead_alg)
+    return aes_key, nonce, tag, sha256, out.getvalue()
+
+
+def _decrypt(ciphertext, aes_key, nonce, tag, aead_alg):
+    return b''.join(
+        HybridEncryption.iter_decrypt_file(io.BytesIO(ciphertext), aes_key, nonce, tag, aead_alg)
+    )
+
+
+class FileEncryptionTests(SimpleTestCase):
+    """Round trip, tamper and truncation checks for every file AEAD"""
+    
+    def test_round_trip(self):
+        for aead_alg in AEADS:
+            for size in SIZES:
+                with self.subTest(aead_alg=aead_alg, size=size):
+                    data = os.urandom(size)
+                    aes_key, nonce, tag, sha256, ciphertext = _encrypt(data, aead_alg)
+                    
+                    self.assertEqual(_decrypt(ciphertext, aes_key, nonce, tag, aead_alg), data)
+                    self.assertEqual(sha256, hashlib.sha256(data).digest())
+    
+    def test_chunked_layout(self):
+        for aead_alg in CHUNKED_AEADS:
+            for size in SIZES:
+                with self.subTest(aead_alg=aead_alg, size=size):
+                    _, nonce, tag, _, ciphertext = _encrypt(os.urandom(size), aead_alg)
+                    chunks = max(1, -(-size // STREAM_CHUNK_SIZE))
+                    
+                    self.assertEqual(len(ciphertext), size + chunks * CHUNK_TAG_SIZE)
+                    self.assertEqual(tag, b'')
+    
+    def test_tampered_ciphertext_fails(self):
+        for aead_alg in AEADS:
+            for size in SIZES[1:]:
+                with self.subTest(aead_alg=aead_alg, size=size):
+                    aes_key, nonce, tag, _, ciphertext = _encrypt(os.urandom(size), aead_alg)
+                    tampered = bytearray(ciphertext)
+                    tampered[len(tampered) // 2] ^= 1
+                    
+                    with self.assertRaises(InvalidTag):
+                        _decrypt(bytes(tampered), aes_key, nonce, tag, aead_alg)
+    
+    def test_truncated_ciphertext_fails(self):
+        for aead_alg in AEADS:
+            for size in SIZES:
+                with self.subTest(aead_alg=aead_alg, size=size):
+                    aes_key, nonce, tag, _, ciphertext = _encrypt(os.urandom(size), aead_alg)
+                    if aead_alg in CHUNKED_AEADS:
+                        # Drop the whole final chunk, leaving a valid earlier one
+                        final = (size % STREAM_CHUNK_SIZE or STREAM_CHUNK_SIZE) if size else 0
+                        truncated = ciphertext[:-(final + CHUNK_TAG_SIZE)]
+                    elif size:
+                        truncated = ciphertext[:-1]
+                    else:
+                        # Empty legacy GCM output has nothing to cut; tamper the tag
+                        truncated, tag = ciphertext, bytes([tag[0] ^ 1]) + tag[1:]
+                    
+                    with self.assertRaises(InvalidTag):
+                        _decrypt(truncated, aes_key, nonce, tag, aead_alg)
+    
+    def test_wrong_key_fails(self):
+        for aead_alg in AEADS:
+            with self.subTest(aead_alg=aead_alg):
+                _, nonce, tag, _, ciphertext = _encrypt(b'secret', aead_alg)
+                
+                with self.assertRaises(InvalidTag):
+                    _decrypt(ciphertext, HybridEncryption.generate_aes_key(), nonce, tag, aead_alg)
+
+
+class KeyWrapTests(SimpleTestCase):
+    """wrap_aes_key_for_users must unwrap for every recipient on both paths"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.key_pairs = [HybridEncryption.generate_rsa_key_pair()] + [
+            HybridEncryption.generate_x25519_key_pair()
+            for _ in range(PARALLEL_WRAP_THRESHOLD + 2)
+        ]
+    
+    def _assert_all_unwrap(self, key_pairs):
+        aes_key = HybridEncryption.generate_aes_key()
+        recipients = [(i, public_pem) for i, (_, public_pem) in enumerate(key_pairs)]
+        
+        wrapped = wrap_aes_key_for_users(aes_key, recipients)
+        
+        self.assertEqual([user for user, _ in wrapped], list(range(len(key_pairs))))
+        for (_, encrypted_aes_key), (private_pem, _) in zip(wrapped, key_pairs):
+            self.assertEqual(
+                HybridEncryption.decrypt_aes_key_with_rsa(encrypted_aes_key, private_pem),
+                aes_key
+            )
+    
+    def test_serial_path(self):
+        with mock.patch.object(encryption, '_get_wrap_executor') as get_executor:
+            self._assert_all_unwrap(self.key_pairs[:PARALLEL_WRAP_THRESHOLD])
+        get_executor.assert_not_called()
+    
+    def test_parallel_path(self):
+        with mock.patch('os.cpu_count', return_value=4), \
+                mock.patch.object(
+                    encryption, '_get_wrap_executor', wraps=encryption._get_wrap_executor
+                ) as get_executor:
+            self._assert_all_unwrap(self.key_pairs)
+        get_executor.assert_called_once()
+    
+    def test_parsed_public_keys(self):
+        aes_key = HybridEncryption.generate_aes_key()
+        private_pem, public_pem = self.key_pairs[1]
+        
+        [(_, encrypted_aes_key)] = wrap_aes_key_for_users(
+            aes_key, [('user', load_public_key(public_pem))]
+        )
+        
+        self.assertEqual(
+            HybridEncryption.decrypt_aes_key_with_rsa(encrypted_aes_key, private_pem), aes_key
+        )
+
+
+class SweepStaleUploadsTests(TestCase):
+    """sweep_stale_uploads removes only old PENDING rows and staged files"""
+    
+    def setUp(self):
+        self.staging_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.staging_root, True)
+        user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.group = FileGroup.objects.create(name='group', created_by=user)
+        self.user = user
+    
+    def _pending_file(self, age):
+        encrypted_file = EncryptedFile.objects.create(
+            filename='f.txt', file_size=1, nonce=b'', tag=b'',
+            status=STATUS_PENDING, uploaded_by=self.user, group=self.group
+        )
+        EncryptedFile.objects.filter(pk=encrypted_file.pk).update(
+            uploaded_at=timezone.now() - timedelta(seconds=age)
+        )
+        return encrypted_file
+    
+    def _staged_file(self, name, age):
+        path = os.path.join(self.staging_root, name)
+        with open(path, 'wb') as staged:
+            staged.write(b'plaintext')
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+    
+    def test_sweeps_only_stale_uploads(self):
+        with override_settings(UPLOAD_STAGING_ROOT=self.staging_root, UPLOAD_STALE_AFTER=3600):
+            stale = self._pending_file(7200)
+            fresh = self._pending_file(60)
+            stale_path = self._staged_file('upload-stale', 7200)
+            fresh_path = self._staged_file('upload-fresh', 60)
+            
+            self.assertEqual(sweep_stale_uploads(), (1, 1))
+        
+        self.assertFalse(EncryptedFile.objects.filter(pk=stale.pk).exists())
+        self.assertTrue(EncryptedFile.objects.filter(pk=fresh.pk).exists())
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertTrue(os.path.exists(fresh_path))
+
+
+class UploadDownloadViewTests(TestCase):
+    """A file uploaded through the views downloads with its name and contents"""
+    
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        
+        password = 'Sup3r-secret-pw'
+        user = CustomUser.objects.create_user(
+            username='owner', email='owner@example.com', password=password
+        )
+        user.generate_rsa_keys(password)
+        self.group = FileGroup.objects.create(name='group', created_by=user)
+        self.group.members.add(user)
+        
+        # Log in through the view so the session holds the private key
+        self.client.post(reverse('users:login'), {'username': 'owner', 'password': password})
+    
+    def test_upload_then_download(self):
+        data = os.urandom(STREAM_CHUNK_SIZE + 7)
+        response = self.client.post(
+            reverse('files:upload', args=[self.group.pk]),
+            {'file': SimpleUploadedFile('report final.pdf', data)}
+        )
+        self.assertRedirects(
+            response, reverse('groups:detail', args=[self.group.pk]),
+            fetch_redirect_response=False
+        )
+        encrypted_file = EncryptedFile.objects.get(group=self.group, status=STATUS_READY)
+        
+        response = self.client.get(reverse('files:download', args=[encrypted_file.pk]))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename="report final.pdf"'
+        )
+        self.assertEqual(response['Content-Length'], str(len(data)))
+        self.assertEqual(b''.join(response.streaming_content), data)
@@ -9,6 +9,7 @@ app_name = 'files'
 urlpatterns = [
     path('', views.file_list, name='list'),
     path('upload/<int:group_id>/', views.upload_file, name='upload'),
+    path('upload/status/<uuid:file_id>/', views.upload_status, name='upload_status'),
     path('download/<uuid:file_id>/', views.download_file, name='download'),
     path('delete/<uuid:file_id>/', views.delete_file, name='delete'),
 ]
@@ -4,13 +4,48 @@ File Upload/Download/Delete Views
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import FileResponse, Http404
-from django.core.files.base import ContentFile
+from django.http import JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.http import content_disposition_header
 from groups.models import FileGroup
-from .models import EncryptedFile, FileEncryptionKey
+from users.crypto import get_private_key
+from .models import EncryptedFile, FileEncryptionKey, STATUS_PENDING, STATUS_READY
 from .forms import FileUploadForm
-from .encryption import HybridEncryption, encode_for_db, decode_from_db
+from .encryption import HybridEncryption
+from .tasks import discard_upload, encrypt_and_store, encrypt_file_for_group
 import os
+import shutil
+import tempfile
+
+
+# Rows per page in the file list
+FILES_PER_PAGE = 50
+
+
+def _stage_upload(uploaded_file):
+    """
+    Save an upload's plaintext where the encryption worker can read it
+    
+    Args:
+        uploaded_file (UploadedFile): File from request.FILES
+    
+    Returns:
+        str: Path of the staged file (owner-only permissions)
+    """
+    os.makedirs(settings.UPLOAD_STAGING_ROOT, mode=0o700, exist_ok=True)
+    fd, staged_path = tempfile.mkstemp(prefix='upload-', dir=settings.UPLOAD_STAGING_ROOT)
+    
+    with os.fdopen(fd, 'wb') as staged:
+        if hasattr(uploaded_file, 'temporary_file_path'):
+            # Large uploads are already on disk; move rather than copy
+            staged.close()
+            shutil.move(uploaded_file.temporary_file_path(), staged_path)
+        else:
+            for chunk in uploaded_file.chunks():
+                staged.write(chunk)
+    
+    return staged_path
 
 
 @login_required
@@ -20,12 +55,12 @@ def upload_file(request, group_id):
     
     Process:
     1. User uploads file
-    2. Generate random AES key
-    3. Encrypt file with AES-GCM
-    4. For each group member:
-       - Encrypt AES key with their RSA public key
-       - Store in FileEncryptionKey table
-    5. Save encrypted file to disk
+    2. Create a PENDING EncryptedFile record
+    3. Files under UPLOAD_ASYNC_THRESHOLD are encrypted inline
+       (files.tasks.encrypt_file_for_group: encrypt, wrap the AES key for
+       each group member, mark READY)
+    4. Larger files are staged and queued to encrypt_and_store; the view
+       returns 202 with a page that polls upload_status
     """
     group = get_object_or_404(FileGroup, pk=group_id)
     
@@ -39,64 +74,53 @@ def upload_file(request, group_id):
         if form.is_valid():
             uploaded_file = request.FILES['file']
             
+            # Record the upload; it stays hidden until encryption finishes
+            encrypted_file = EncryptedFile.objects.create(
+                filename=uploaded_file.name,
+                file_size=uploaded_file.size,
+                nonce=b'',
+                tag=b'',
+                status=STATUS_PENDING,
+                uploaded_by=request.user,
+                group=group
+            )
+            
+            staged_path = None
             try:
-                # Read file data
-                file_data = uploaded_file.read()
-                
-                # Generate random AES key
-                aes_key = HybridEncryption.generate_aes_key()
-                
-                # Encrypt file with AES-GCM
-                encrypted_data = HybridEncryption.encrypt_file_aes(file_data, aes_key)
-                
-                # Create encrypted file record
-                encrypted_file = EncryptedFile.objects.create(
-                    filename=uploaded_file.name,
-                    file_size=len(file_data),
-                    nonce=encode_for_db(encrypted_data['nonce']),
-                    tag=encode_for_db(encrypted_data['tag']),
-                    uploaded_by=request.user,
-                    group=group
-                )
-                
-                # Save encrypted file to disk
-                encrypted_file.file.save(
-                    f'{encrypted_file.id}.enc',
-                    ContentFile(encrypted_data['ciphertext']),
-                    save=True
-                )
-                
-                # Encrypt AES key for each group member
-                members = group.members.all()
-                for member in members:
-                    # Get member's RSA public key
-                    public_key = member.get_public_key_bytes()
-                    
-                    if public_key:
-                        # Encrypt AES key with member's public key
-                        encrypted_aes_key = HybridEncryption.encrypt_aes_key_with_rsa(
-                            aes_key, public_key
-                        )
-                        
-                        # Store encrypted AES key for this member
-                        FileEncryptionKey.objects.create(
-                            file=encrypted_file,
-                            user=member,
-                            encrypted_aes_key=encode_for_db(encrypted_aes_key)
-                        )
-                
-                messages.success(
-                    request,
-                    f'File "{uploaded_file.name}" uploaded and encrypted for {members.count()} member(s)!'
-                )
-                return redirect('groups:detail', pk=group_id)
-                
+                if uploaded_file.size < settings.UPLOAD_ASYNC_THRESHOLD:
+                    # Small files: encrypting inline is cheaper than staging
+                    # and queueing them, and needs no status page
+                    encrypt_file_for_group(encrypted_file, uploaded_file)
+                    status = STATUS_READY
+                else:
+                    # Encrypt in a Celery worker (inline when CELERY_TASK_ALWAYS_EAGER)
+                    staged_path = _stage_upload(uploaded_file)
+                    encrypt_and_store.delay(str(encrypted_file.id), staged_path)
+                    status = EncryptedFile.objects.filter(
+                        pk=encrypted_file.pk
+                    ).values_list('status', flat=True).first()
             except Exception as e:
+                if staged_path and os.path.exists(staged_path):
+                    os.remove(staged_path)
+                discard_upload(encrypted_file)
                 messages.error(request, f'Error uploading file: {str(e)}')
-                # Clean up if error occurred
-                if 'encrypted_file' in locals():
-                    encrypted_file.file.delete()
-                    encrypted_file.delete()
+            else:
+                if status == STATUS_READY:
+                    messages.success(
+                        request,
+                        f'File "{uploaded_file.name}" uploaded and encrypted for all group members!'
+                    )
+                    return redirect('groups:detail', pk=group_id)
+                
+                if status == STATUS_PENDING:
+                    # Accepted; the page polls upload_status until it is ready
+                    context = {
+                        'group': group,
+                        'file': encrypted_file,
+                    }
+                    return render(request, 'files/upload_pending.html', context, status=202)
+                
+                messages.error(request, f'Error uploading file: encryption of "{uploaded_file.name}" failed.')
     else:
         form = FileUploadForm()
     
@@ -121,7 +145,11 @@ def download_file(request, file_id):
     6. Decrypt file with AES key
     7. Return original file
     """
-    encrypted_file = get_object_or_404(EncryptedFile, pk=file_id)
+    encrypted_file = get_object_or_404(
+        EncryptedFile.objects.select_related('group'),
+        pk=file_id,
+        status=STATUS_READY
+    )
     
     # Check if user is member of file's group
     if not encrypted_file.group.is_member(request.user):
@@ -135,42 +163,47 @@ def download_file(request, file_id):
             user=request.user
         )
         
-        # Get user's decrypted RSA private key from session
-        private_key_pem = request.session.get('private_key')
-        if not private_key_pem:
+        # Get user's decrypted private key via the session's handle
+        # (parsed key cached in this process for SESSION_KEY_CACHE_TTL)
+        private_key = get_private_key(request)
+        if private_key is None:
             messages.error(request, 'Session expired. Please login again.')
             return redirect('users:login')
         
-        # Decrypt AES key with RSA private key
-        encrypted_aes_key = decode_from_db(file_key.encrypted_aes_key)
+        # Decrypt AES key with the user's private key
         aes_key = HybridEncryption.decrypt_aes_key_with_rsa(
-            encrypted_aes_key,
-            private_key_pem.encode('utf-8')
+            bytes(file_key.encrypted_aes_key),
+            private_key
         )
         
-        # Read encrypted file from disk
-        encrypted_file.file.open('rb')
-        ciphertext = encrypted_file.file.read()
-        encrypted_file.file.close()
+        # Get nonce and tag (BinaryField may return a memoryview)
+        nonce = bytes(encrypted_file.nonce)
+        tag = bytes(encrypted_file.tag)
         
-        # Get nonce and tag
-        nonce = decode_from_db(encrypted_file.nonce)
-        tag = decode_from_db(encrypted_file.tag)
+        # Decrypt file with its AEAD while streaming it to the client; the
+        # worker never holds more than one chunk of plaintext, and chunked
+        # AEADs authenticate every chunk before it is sent
+        ciphertext_file = encrypted_file.file.open('rb')
         
-        # Decrypt file with AES
-        plaintext = HybridEncryption.decrypt_file_aes(
-            ciphertext, aes_key, nonce, tag
-        )
+        def stream_plaintext():
+            with ciphertext_file:
+                yield from HybridEncryption.iter_decrypt_file(
+                    ciphertext_file, aes_key, nonce, tag, encrypted_file.aead_alg
+                )
         
-        # Create response with decrypted file
-        response = FileResponse(
-            ContentFile(plaintext),
+        response = StreamingHttpResponse(
+            stream_plaintext(),
             content_type='application/octet-stream'
         )
-        response['Content-Disposition'] = f'attachment; filename="{encrypted_file.filename}"'
+        response['Content-Disposition'] = content_disposition_header(
+            True, encrypted_file.filename
+        )
+        # Known length lets clients detect a download cut short by a failed
+        # authentication check
+        response['Content-Length'] = str(encrypted_file.file_size)
         
         return response
-        
+    
     except FileEncryptionKey.DoesNotExist:
         messages.error(request, 'You do not have access to this file.')
         return redirect('groups:detail', pk=encrypted_file.group.pk)
@@ -182,21 +215,24 @@ def download_file(request, file_id):
 @login_required
 def delete_file(request, file_id):
     """Delete encrypted file"""
-    encrypted_file = get_object_or_404(EncryptedFile, pk=file_id)
+    encrypted_file = get_object_or_404(
+        EncryptedFile.objects.select_related('group', 'uploaded_by'),
+        pk=file_id
+    )
     
     # Check permissions (uploader or group owner)
-    if request.user != encrypted_file.uploaded_by and \
+    if request.user.id != encrypted_file.uploaded_by_id and \
        not encrypted_file.group.is_owner(request.user):
         messages.error(request, 'You do not have permission to delete this file.')
-        return redirect('groups:detail', pk=encrypted_file.group.pk)
+        return redirect('groups:detail', pk=encrypted_file.group_id)
     
     if request.method == 'POST':
-        group_id = encrypted_file.group.pk
+        group_id = encrypted_file.group_id
         filename = encrypted_file.filename
         
-        # Delete file from disk
+        # Delete file from disk (the row is deleted next, so skip saving it)
         if encrypted_file.file:
-            encrypted_file.file.delete()
+            encrypted_file.file.delete(save=False)
         
         # Delete database record (FileEncryptionKeys cascade delete automatically)
         encrypted_file.delete()
@@ -216,10 +252,34 @@ def file_list(request):
     # Get all groups user is member of
     user_groups = request.user.file_groups.all()
     
-    # Get all files in those groups
-    files = EncryptedFile.objects.filter(group__in=user_groups)
+    # Get files in those groups, fetching only the columns the list shows
+    # (never the encryption metadata) along with uploader and group
+    files = EncryptedFile.objects.filter(
+        group__in=user_groups, status=STATUS_READY
+    ).select_related('uploaded_by', 'group').only(
+        'id', 'filename', 'file_size', 'uploaded_at',
+        'uploaded_by__username', 'group__name', 'group__created_by',
+    )
+    
+    page = Paginator(files, FILES_PER_PAGE).get_page(request.GET.get('page'))
     
     context = {
-        'files': files,
+        'files': page,
     }
     return render(request, 'files/file_list.html', context)
+
+
+@login_required
+def upload_status(request, file_id):
+    """
+    Report background encryption status of one of the user's uploads
+    
+    Returns JSON {"status": "pending" | "ready" | "failed"}; failed uploads
+    are deleted by the worker, so a missing record means failure.
+    """
+    status = EncryptedFile.objects.filter(
+        pk=file_id,
+        uploaded_by=request.user
+    ).values_list('status', flat=True).first()
+    
+    return JsonResponse({'status': status or 'failed'})
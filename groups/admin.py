@@ -2,6 +2,7 @@
 Group Admin Configuration
 """
 from django.contrib import admin
+from django.db.models import Count
 from .models import FileGroup
 
 
@@ -25,6 +26,12 @@ class FileGroupAdmin(admin.ModelAdmin):
     
     readonly_fields = ['created_at']
     
+    def get_queryset(self, request):
+        """Fetch owners and member counts in the list query"""
+        return super().get_queryset(request).select_related(
+            'created_by'
+        ).annotate(n_members=Count('members'))
+    
     def member_count(self, obj):
         """Display member count"""
         return obj.member_count()
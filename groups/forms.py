@@ -3,7 +3,7 @@ Group Forms
 """
 from django import forms
 from .models import FileGroup
-from users.models import CustomUser
+from users.models import CustomUser, KEY_FIELDS
 
 
 class GroupCreateForm(forms.ModelForm):
@@ -61,9 +61,9 @@ class AddMemberForm(forms.Form):
         """Validate username exists and is not already a member"""
         username = self.cleaned_data.get('username')
         
-        # Check if user exists
+        # Check if user exists (key columns are not needed here)
         try:
-            user = CustomUser.objects.get(username=username)
+            user = CustomUser.objects.defer(*KEY_FIELDS).get(username=username)
         except CustomUser.DoesNotExist:
             raise forms.ValidationError('User with this username does not exist.')
         
@@ -71,4 +71,6 @@ class AddMemberForm(forms.Form):
         if self.group and self.group.is_member(user):
             raise forms.ValidationError('This user is already a member of the group.')
         
+        # Keep the looked-up user for the view
+        self.user = user
         return username
@@ -3,6 +3,7 @@ FileGroup Model for Encrypted File Sharing
 """
 from django.db import models
 from django.conf import settings
+from django.utils.functional import cached_property
 
 
 class FileGroup(models.Model):
@@ -56,15 +57,31 @@ class FileGroup(models.Model):
     
     def member_count(self):
         """Return number of members in the group"""
-        return self.members.count()
+        # Querysets annotated with n_members (group_list, admin) skip the query
+        n_members = getattr(self, 'n_members', None)
+        if n_members is not None:
+            return n_members
+        return len(self._member_ids)
+    
+    @cached_property
+    def _member_ids(self):
+        """
+        Ids of all members, loaded once per instance
+        
+        Uses prefetched members when the queryset has them
+        (prefetch_related('members')), otherwise a single id-only query.
+        """
+        if 'members' in getattr(self, '_prefetched_objects_cache', {}):
+            return frozenset(member.id for member in self.members.all())
+        return frozenset(self.members.values_list('id', flat=True))
     
     def is_member(self, user):
         """Check if user is a member of this group"""
-        return self.members.filter(id=user.id).exists()
+        return user.id in self._member_ids
     
     def is_owner(self, user):
         """Check if user is the owner of this group"""
-        return self.created_by == user
+        return self.created_by_id == user.id
     
     def can_manage(self, user):
         """Check if user can manage (edit/delete) this group"""
@@ -74,8 +91,10 @@ class FileGroup(models.Model):
         """Add a user to the group"""
         if not self.is_member(user):
             self.members.add(user)
+            self.__dict__.pop('_member_ids', None)
     
     def remove_member(self, user):
         """Remove a user from the group"""
         if self.is_member(user) and not self.is_owner(user):
             self.members.remove(user)
+            self.__dict__.pop('_member_ids', None)
@@ -4,19 +4,35 @@ Group Views
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db.models import BooleanField, Case, Count, Q, Value, When
 from .models import FileGroup
 from .forms import GroupCreateForm, GroupEditForm, AddMemberForm
-from users.models import CustomUser
+from users.models import CustomUser, KEY_FIELDS
+from files.models import STATUS_READY
 
 
 @login_required
 def group_list(request):
     """Display all groups the user is a member of or owns"""
-    # Groups owned by user
-    owned_groups = FileGroup.objects.filter(created_by=request.user)
-    
-    # Groups user is a member of
-    member_groups = request.user.file_groups.exclude(created_by=request.user)
+    # Owned and joined groups with their member counts in one query
+    # (membership is a subquery so the COUNT join isn't filtered)
+    groups = FileGroup.objects.filter(
+        Q(created_by=request.user) |
+        Q(pk__in=request.user.file_groups.values('pk'))
+    ).select_related('created_by').annotate(
+        n_members=Count('members'),
+        owned=Case(
+            When(created_by=request.user, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        )
+    )
+    
+    # Split into groups owned by user and groups user is a member of
+    owned_groups = []
+    member_groups = []
+    for group in groups:
+        (owned_groups if group.owned else member_groups).append(group)
     
     context = {
         'owned_groups': owned_groups,
@@ -49,15 +65,25 @@ def group_create(request):
 @login_required
 def group_detail(request, pk):
     """View group details and members"""
-    group = get_object_or_404(FileGroup, pk=pk)
+    group = get_object_or_404(
+        FileGroup.objects.select_related('created_by').defer(
+            *(f'created_by__{field}' for field in KEY_FIELDS)
+        ),
+        pk=pk
+    )
     
     # Check if user is a member or owner
     if not group.is_member(request.user) and not group.is_owner(request.user):
         messages.error(request, 'You do not have access to this group.')
         return redirect('groups:list')
     
-    # Get all members
-    members = group.members.all()
+    # Get all members (only what the member list shows)
+    members = group.members.only('id', 'username')
+    
+    # Get files that have finished encrypting
+    files = group.files.filter(status=STATUS_READY).select_related('uploaded_by').defer(
+        *(f'uploaded_by__{field}' for field in KEY_FIELDS)
+    )
     
     # Check if user can manage group
     can_manage = group.can_manage(request.user)
@@ -65,6 +91,7 @@ def group_detail(request, pk):
     context = {
         'group': group,
         'members': members,
+        'files': files,
         'can_manage': can_manage,
     }
     return render(request, 'groups/group_detail.html', context)
@@ -129,8 +156,7 @@ def add_member(request, pk):
         form = AddMemberForm(request.POST, group=group)
         if form.is_valid():
             username = form.cleaned_data['username']
-            user = CustomUser.objects.get(username=username)
-            group.add_member(user)
+            group.add_member(form.user)
             messages.success(request, f'{username} added to group "{group.name}"!')
             return redirect('groups:detail', pk=pk)
     else:
@@ -147,7 +173,7 @@ def add_member(request, pk):
 def remove_member(request, pk, user_id):
     """Remove a member from a group"""
     group = get_object_or_404(FileGroup, pk=pk)
-    user_to_remove = get_object_or_404(CustomUser, pk=user_id)
+    user_to_remove = get_object_or_404(CustomUser.objects.defer(*KEY_FIELDS), pk=user_id)
     
     # Check if requester can manage group
     if not group.can_manage(request.user):
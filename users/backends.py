@@ -0,0 +1,52 @@
+"""
+Authentication Backend
+"""
+from django.contrib.auth.backends import ModelBackend
+from .models import CustomUser
+
+
+# Columns login never reads: password check and private-key unlock only
+# need encrypted_private_key
+LOGIN_DEFERRED_FIELDS = ('public_key', 'public_key_der')
+
+# Columns request.user never reads on ordinary pages
+REQUEST_USER_DEFERRED_FIELDS = ('encrypted_private_key', 'public_key_der')
+
+
+class CustomUserBackend(ModelBackend):
+    """
+    ModelBackend that skips key columns the auth paths do not use
+    
+    authenticate() loads the user for the password check and the
+    private-key unlock in login_view; get_user() loads request.user on
+    every authenticated request.
+    """
+    
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(CustomUser.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        
+        try:
+            user = CustomUser._default_manager.defer(*LOGIN_DEFERRED_FIELDS).get(
+                **{CustomUser.USERNAME_FIELD: username}
+            )
+        except CustomUser.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user
+            CustomUser().set_password(password)
+            return None
+        
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+    
+    def get_user(self, user_id):
+        try:
+            user = CustomUser._default_manager.defer(*REQUEST_USER_DEFERRED_FIELDS).get(
+                pk=user_id
+            )
+        except CustomUser.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,155 @@
+"""
+Session Access to Users' Decrypted Private Keys
+
+The decrypted private key never goes into the session itself. The
+session only holds a random handle; the PEM sits in the cache encrypted
+under a key derived from that handle and SECRET_KEY. The cached_db
+session engine keeps sessions in the same cache, so the server secret is
+what stops read access to the cache alone from recovering the key.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from collections import OrderedDict
+import base64
+import os
+import secrets
+import threading
+import time
+
+
+# Session key holding the handle of the logged-in user's private key
+PRIVATE_KEY_HANDLE = 'pk_handle'
+PRIVATE_KEY_HANDLE_SIZE = 32
+PRIVATE_KEY_CACHE_PREFIX = 'pk:'
+PRIVATE_KEY_NONCE_SIZE = 12
+
+# Process-local cache of parsed private keys, keyed by the handle's cache
+# key, so repeat downloads skip the cache round-trip, the AES-GCM unseal
+# and the PEM parse. Logout only evicts in the process that served it;
+# the TTL bounds how long other workers keep a logged-out user's key.
+SESSION_KEY_CACHE_SIZE = 1024
+SESSION_KEY_CACHE_TTL = 1800  # seconds
+_session_key_cache = OrderedDict()
+_session_key_cache_lock = threading.Lock()
+
+
+def _handle_keys(handle):
+    """
+    Derive the cache key and the PEM encryption key from a handle
+    
+    Both are HMACs keyed with SECRET_KEY, so a handle read out of the
+    session cache is useless without the server secret.
+    
+    Args:
+        handle (str): Handle stored in the session
+    
+    Returns:
+        tuple: (cache key, 32-byte AES key)
+    """
+    token = base64.urlsafe_b64decode(handle.encode('ascii'))
+    cache_id = salted_hmac('users.crypto.pk-cache-id', token, algorithm='sha256').hexdigest()
+    aes_key = salted_hmac('users.crypto.pk-cache-key', token, algorithm='sha256').digest()
+    return PRIVATE_KEY_CACHE_PREFIX + cache_id, aes_key
+
+
+def store_private_key(request, private_key_pem):
+    """
+    Keep a decrypted private key for the rest of the session
+    
+    Args:
+        request (HttpRequest): Current request (its session gets the handle)
+        private_key_pem (bytes): Decrypted PEM private key
+    """
+    handle = base64.urlsafe_b64encode(secrets.token_bytes(PRIVATE_KEY_HANDLE_SIZE)).decode('ascii')
+    cache_key, aes_key = _handle_keys(handle)
+    
+    nonce = os.urandom(PRIVATE_KEY_NONCE_SIZE)
+    sealed = nonce + AESGCM(aes_key).encrypt(nonce, private_key_pem, None)
+    cache.set(cache_key, sealed, timeout=settings.SESSION_COOKIE_AGE)
+    
+    request.session[PRIVATE_KEY_HANDLE] = handle
+
+
+def get_private_key_pem(request):
+    """
+    Get the session's decrypted private key
+    
+    Returns:
+        bytes: PEM private key, or None if the session has none or it expired
+    """
+    handle = request.session.get(PRIVATE_KEY_HANDLE)
+    if not handle:
+        return None
+    
+    cache_key, aes_key = _handle_keys(handle)
+    sealed = cache.get(cache_key)
+    if sealed is None:
+        return None
+    
+    try:
+        return AESGCM(aes_key).decrypt(
+            sealed[:PRIVATE_KEY_NONCE_SIZE], sealed[PRIVATE_KEY_NONCE_SIZE:], None
+        )
+    except InvalidTag:
+        return None
+
+
+def get_private_key(request):
+    """
+    Get the session's parsed private key
+    
+    Served from a process-local cache keyed by the session's handle;
+    entries expire after SESSION_KEY_CACHE_TTL and on logout.
+    
+    Returns:
+        RSAPrivateKey or X25519PrivateKey, or None if unavailable
+    """
+    handle = request.session.get(PRIVATE_KEY_HANDLE)
+    if not handle:
+        return None
+    
+    cache_key = _handle_keys(handle)[0]
+    now = time.monotonic()
+    
+    with _session_key_cache_lock:
+        entry = _session_key_cache.get(cache_key)
+        if entry is not None:
+            expires, private_key = entry
+            if expires > now:
+                _session_key_cache.move_to_end(cache_key)
+                return private_key
+            del _session_key_cache[cache_key]
+    
+    private_key_pem = get_private_key_pem(request)
+    if private_key_pem is None:
+        return None
+    private_key = serialization.load_pem_private_key(
+        private_key_pem,
+        password=None,
+        backend=default_backend()
+    )
+    
+    with _session_key_cache_lock:
+        _session_key_cache[cache_key] = (now + SESSION_KEY_CACHE_TTL, private_key)
+        while len(_session_key_cache) > SESSION_KEY_CACHE_SIZE:
+            _session_key_cache.popitem(last=False)
+    
+    return private_key
+
+
+def forget_session_private_key(request):
+    """Drop the session's private key from the cache and this process's parsed copy"""
+    handle = request.session.get(PRIVATE_KEY_HANDLE)
+    if not handle:
+        return
+    
+    cache_key = _handle_keys(handle)[0]
+    with _session_key_cache_lock:
+        _session_key_cache.pop(cache_key, None)
+    
+    cache.delete(cache_key)
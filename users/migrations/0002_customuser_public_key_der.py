@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-15 21:31
+
+from cryptography.hazmat.primitives import serialization
+from django.db import migrations, models
+
+
+def pem_to_der(apps, schema_editor):
+    """Fill public_key_der from the existing PEM public keys"""
+    CustomUser = apps.get_model('users', 'CustomUser')
+
+    users = CustomUser.objects.exclude(
+        public_key__isnull=True
+    ).exclude(
+        public_key=''
+    ).only('public_key')
+
+    for user in users.iterator():
+        public_key = serialization.load_pem_public_key(user.public_key.encode('utf-8'))
+        user.public_key_der = public_key.public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        user.save(update_fields=['public_key_der'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='public_key_der',
+            field=models.BinaryField(blank=True, editable=False, help_text='Public key in DER format (SubjectPublicKeyInfo)', null=True),
+        ),
+        migrations.RunPython(pem_to_der, migrations.RunPython.noop),
+    ]
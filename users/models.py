@@ -3,15 +3,77 @@ CustomUser Model with RSA Encryption Keys
 """
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.fernet import Fernet
+from argon2.low_level import Type, hash_secret_raw
+from files.encryption import (
+    HybridEncryption, load_public_key, load_public_key_der, public_key_pem_to_der
+)
+from collections import OrderedDict
+import threading
 import base64
+import hashlib
 import os
 
 
+# Password KDFs protecting the stored private key. Stored value is
+# base64(salt + Fernet token), prefixed with 'argon2id$' for Argon2id;
+# unprefixed values are legacy PBKDF2-SHA256.
+KDF_PBKDF2 = 'pbkdf2'
+KDF_ARGON2ID = 'argon2id'
+PRIVATE_KEY_SALT_SIZE = 16
+PBKDF2_ITERATIONS = 100000
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 64 * 1024  # KiB
+ARGON2_PARALLELISM = 1
+
+
+def derive_private_key_kek(password, salt, kdf=KDF_ARGON2ID):
+    """
+    Derive the key that encrypts a user's private key
+    
+    Args:
+        password (str): User's password
+        salt (bytes): Per-user random salt
+        kdf (str): KDF_ARGON2ID or KDF_PBKDF2
+        
+    Returns:
+        bytes: 32-byte key
+    """
+    if kdf == KDF_ARGON2ID:
+        return hash_secret_raw(
+            password.encode(),
+            salt,
+            time_cost=ARGON2_TIME_COST,
+            memory_cost=ARGON2_MEMORY_COST,
+            parallelism=ARGON2_PARALLELISM,
+            hash_len=32,
+            type=Type.ID
+        )
+    
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=PBKDF2_ITERATIONS,
+        backend=default_backend()
+    )
+    return kdf.derive(password.encode())
+
+
+# Key columns that user lookups in group/member views never need
+KEY_FIELDS = ('encrypted_private_key', 'public_key', 'public_key_der')
+
+# Process-local cache of parsed public keys, keyed by (user id, SHA-256 of
+# the stored key) so a changed key misses in every process
+# (see CustomUser.get_public_key_objects)
+PUBLIC_KEY_CACHE_SIZE = 4096
+_public_key_cache = OrderedDict()
+_public_key_cache_lock = threading.Lock()
+
+
 class CustomUser(AbstractUser):
     """
     Extended User model with RSA encryption keys
@@ -25,8 +87,9 @@ class CustomUser(AbstractUser):
     - date_joined, last_login
     
     New Fields:
-    - encrypted_private_key: RSA private key encrypted with user's password
-    - public_key: RSA public key (PEM format)
+    - encrypted_private_key: RSA/X25519 private key encrypted with user's password
+    - public_key: RSA/X25519 public key (PEM format)
+    - public_key_der: Same public key in DER, parsed on the upload path
     """
     
     # Make email unique and required
@@ -48,6 +111,14 @@ class CustomUser(AbstractUser):
         help_text='RSA public key in PEM format'
     )
     
+    # Kept in sync with public_key by save()
+    public_key_der = models.BinaryField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text='Public key in DER format (SubjectPublicKeyInfo)'
+    )
+    
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
@@ -56,36 +127,105 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.email})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded public key so save() can detect rotation"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_public_key = instance.__dict__.get('public_key')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Save user, refreshing the DER key if public_key changed"""
+        public_key = self.__dict__.get('public_key')
+        changed = public_key != getattr(self, '_loaded_public_key', None)
+        if changed:
+            self.public_key_der = (
+                public_key_pem_to_der(public_key.encode('utf-8')) if public_key else None
+            )
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'public_key' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'public_key_der'}
+        
+        super().save(*args, **kwargs)
+        if changed:
+            self._loaded_public_key = public_key
+    
+    @classmethod
+    def get_public_key_objects(cls, user_ids):
+        """
+        Get parsed public keys for many users
+        
+        The stored keys are fetched in a single query on every call; only
+        the parsing is cached, keyed by user id and a digest of the stored
+        key. A key changed by another process (e.g. while a long-running
+        worker is up) misses the cache and is parsed afresh.
+        
+        Args:
+            user_ids: Iterable of user ids
+            
+        Returns:
+            dict: {user_id: public key object}, omitting users without keys
+        """
+        rows = list(cls.objects.filter(
+            pk__in=user_ids
+        ).exclude(
+            public_key__isnull=True
+        ).exclude(
+            public_key=''
+        ).values_list('pk', 'public_key_der', 'public_key'))
+        
+        public_keys = {}
+        missing = []
+        
+        with _public_key_cache_lock:
+            for user_id, public_der, public_pem in rows:
+                stored = bytes(public_der) if public_der else public_pem.encode('utf-8')
+                cache_key = (user_id, hashlib.sha256(stored).digest())
+                public_key = _public_key_cache.get(cache_key)
+                if public_key is None:
+                    missing.append((cache_key, public_der, stored))
+                else:
+                    _public_key_cache.move_to_end(cache_key)
+                    public_keys[user_id] = public_key
+        
+        parsed = []
+        for cache_key, public_der, stored in missing:
+            if public_der:
+                public_key = load_public_key_der(stored)
+            else:
+                public_key = load_public_key(stored)
+            public_keys[cache_key[0]] = public_key
+            parsed.append((cache_key, public_key))
+        
+        if parsed:
+            with _public_key_cache_lock:
+                _public_key_cache.update(parsed)
+                while len(_public_key_cache) > PUBLIC_KEY_CACHE_SIZE:
+                    _public_key_cache.popitem(last=False)
+        
+        return public_keys
+    
     def has_rsa_keys(self):
         """Check if user has RSA keys generated"""
         return bool(self.public_key and self.encrypted_private_key)
     
     def generate_rsa_keys(self, password):
         """
-        Generate RSA-2048 key pair and encrypt private key with password
+        Generate key pair and encrypt private key with password
+        
+        New users get an X25519 key pair, which is orders of magnitude faster
+        to generate than RSA-2048 and keeps sign-up off the slow path.
+        Existing RSA-2048 keys are still accepted everywhere.
         
         Args:
             password (str): User's password to encrypt private key
+            
+        Returns:
+            bytes: The new private key (PEM), so callers can use it without
+            running the password KDF again
         """
-        # Generate RSA-2048 key pair
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
-        )
-        public_key = private_key.public_key()
-        
-        # Serialize keys to PEM format
-        private_pem = private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        )
-        
-        public_pem = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
+        # Generate X25519 key pair (PEM format)
+        private_pem, public_pem = HybridEncryption.generate_x25519_key_pair()
         
         # Encrypt private key with user's password
         encrypted_private = self._encrypt_private_key(private_pem, password)
@@ -93,39 +233,66 @@ class CustomUser(AbstractUser):
         # Store in database
         self.encrypted_private_key = encrypted_private
         self.public_key = public_pem.decode('utf-8')
-        self.save()
+        self.save(update_fields=['encrypted_private_key', 'public_key'])
+        
+        return private_pem
     
     def _encrypt_private_key(self, private_key_bytes, password):
         """
-        Encrypt private key using password-derived key (PBKDF2)
+        Encrypt private key using password-derived key (Argon2id)
         
         Args:
-            private_key_bytes: RSA private key as bytes
+            private_key_bytes: Private key as bytes
             password: User's password
             
         Returns:
-            Encrypted private key as base64 string
+            Encrypted private key as prefixed base64 string
         """
         # Generate salt
-        salt = os.urandom(16)
-        
-        # Derive encryption key from password using PBKDF2
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-            backend=default_backend()
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
+        salt = os.urandom(PRIVATE_KEY_SALT_SIZE)
+        
+        # Derive encryption key from password (memory-hard)
+        key = derive_private_key_kek(password, salt, KDF_ARGON2ID)
         
         # Encrypt private key
-        f = Fernet(key)
+        f = Fernet(base64.urlsafe_b64encode(key))
         encrypted = f.encrypt(private_key_bytes)
         
         # Combine salt + encrypted key for storage
         combined = base64.b64encode(salt + encrypted).decode('utf-8')
-        return combined
+        return f'{KDF_ARGON2ID}${combined}'
+    
+    def _split_encrypted_private_key(self):
+        """
+        Parse the stored private key blob
+        
+        Returns:
+            tuple: (kdf, salt, Fernet token)
+        """
+        kdf, sep, encoded = self.encrypted_private_key.rpartition('$')
+        combined = base64.b64decode(encoded.encode('utf-8'))
+        return (
+            kdf if sep else KDF_PBKDF2,
+            combined[:PRIVATE_KEY_SALT_SIZE],
+            combined[PRIVATE_KEY_SALT_SIZE:]
+        )
+    
+    def private_key_needs_rewrap(self):
+        """Check if the private key is still protected by legacy PBKDF2"""
+        return bool(self.encrypted_private_key) and (
+            self._split_encrypted_private_key()[0] != KDF_ARGON2ID
+        )
+    
+    def rewrap_private_key(self, private_key_bytes, password):
+        """
+        Re-encrypt an unlocked private key under Argon2id
+        
+        Args:
+            private_key_bytes: Decrypted private key
+            password: User's password
+        """
+        self.encrypted_private_key = self._encrypt_private_key(private_key_bytes, password)
+        self.save(update_fields=['encrypted_private_key'])
     
     def decrypt_private_key(self, password):
         """
@@ -141,25 +308,14 @@ class CustomUser(AbstractUser):
             return None
         
         try:
-            # Decode from base64
-            combined = base64.b64decode(self.encrypted_private_key.encode('utf-8'))
-            
-            # Extract salt and encrypted key
-            salt = combined[:16]
-            encrypted = combined[16:]
+            # Extract KDF, salt and encrypted key
+            kdf, salt, encrypted = self._split_encrypted_private_key()
             
             # Derive decryption key from password
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-                backend=default_backend()
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
+            key = derive_private_key_kek(password, salt, kdf)
             
             # Decrypt private key
-            f = Fernet(key)
+            f = Fernet(base64.urlsafe_b64encode(key))
             private_key_bytes = f.decrypt(encrypted)
             
             return private_key_bytes
@@ -1,3 +1,202 @@
-from django.test import TestCase
+import base64
+import os
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from files.encryption import HybridEncryption, public_key_pem_to_der
+from . import crypto
+from .models import (
+    KDF_ARGON2ID, KDF_PBKDF2, PRIVATE_KEY_SALT_SIZE, CustomUser, derive_private_key_kek
+)
+from .views import LOGIN_FAILURE_LIMIT
+
+
+PASSWORD = 'Sup3r-secret-pw'
+
+
+def _public_bytes(private_key):
+    return private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
+    )
+
+
+class PrivateKeyBlobTests(TestCase):
+    """Argon2id key blobs and the legacy PBKDF2 format"""
+    
+    def setUp(self):
+        self.private_pem, public_pem = HybridEncryption.generate_x25519_key_pair()
+        self.user = CustomUser.objects.create_user(
+            username='legacy', email='legacy@example.com', password=PASSWORD
+        )
+        self.user.public_key = public_pem.decode('utf-8')
+        
+        # Pre-Argon2 format: unprefixed base64(salt + Fernet token)
+        salt = os.urandom(PRIVATE_KEY_SALT_SIZE)
+        kek = derive_private_key_kek(PASSWORD, salt, KDF_PBKDF2)
+        token = Fernet(base64.urlsafe_b64encode(kek)).encrypt(self.private_pem)
+        self.user.encrypted_private_key = base64.b64encode(salt + token).decode('utf-8')
+        self.user.save()
+    
+    def test_new_keys_use_argon2id(self):
+        user = CustomUser.objects.create_user(
+            username='fresh', email='fresh@example.com', password=PASSWORD
+        )
+        private_pem = user.generate_rsa_keys(PASSWORD)
+        
+        self.assertTrue(user.encrypted_private_key.startswith(f'{KDF_ARGON2ID}$'))
+        self.assertFalse(user.private_key_needs_rewrap())
+        self.assertEqual(user.decrypt_private_key(PASSWORD), private_pem)
+        self.assertIsNone(user.decrypt_private_key('wrong password'))
+    
+    def test_legacy_blob_unlocks(self):
+        self.assertTrue(self.user.private_key_needs_rewrap())
+        self.assertEqual(self.user.decrypt_private_key(PASSWORD), self.private_pem)
+        self.assertIsNone(self.user.decrypt_private_key('wrong password'))
+    
+    def test_login_rewraps_legacy_blob(self):
+        response = self.client.post(
+            reverse('users:login'), {'username': 'legacy', 'password': PASSWORD}
+        )
+        
+        self.assertRedirects(response, reverse('users:dashboard'), fetch_redirect_response=False)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.encrypted_private_key.startswith(f'{KDF_ARGON2ID}$'))
+        self.assertFalse(self.user.private_key_needs_rewrap())
+        self.assertEqual(self.user.decrypt_private_key(PASSWORD), self.private_pem)
+
+
+class PublicKeyCacheTests(TestCase):
+    """get_public_key_objects must follow key changes made elsewhere"""
+    
+    def test_changed_key_misses_cache(self):
+        user = CustomUser.objects.create_user(
+            username='rotating', email='rotating@example.com', password=PASSWORD
+        )
+        user.generate_rsa_keys(PASSWORD)
+        first = CustomUser.get_public_key_objects([user.pk])[user.pk]
+        self.assertIs(CustomUser.get_public_key_objects([user.pk])[user.pk], first)
+        
+        # Rotate the key the way another process would: no save() here
+        private_pem, public_pem = HybridEncryption.generate_x25519_key_pair()
+        CustomUser.objects.filter(pk=user.pk).update(
+            public_key=public_pem.decode('utf-8'),
+            public_key_der=public_key_pem_to_der(public_pem)
+        )
+        
+        public_key = CustomUser.get_public_key_objects([user.pk])[user.pk]
+        expected = serialization.load_pem_private_key(private_pem, password=None)
+        self.assertEqual(
+            public_key.public_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PublicFormat.Raw
+            ),
+            _public_bytes(expected)
+        )
+
+
+class SessionPrivateKeyTests(TestCase):
+    """store_private_key / get_private_key / forget_session_private_key"""
+    
+    def setUp(self):
+        cache.clear()
+        self.private_pem, _ = HybridEncryption.generate_x25519_key_pair()
+        self.request = RequestFactory().get('/')
+        self.request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+    
+    def _cache_key(self):
+        return crypto._handle_keys(self.request.session[crypto.PRIVATE_KEY_HANDLE])[0]
+    
+    def test_store_and_get(self):
+        crypto.store_private_key(self.request, self.private_pem)
+        
+        self.assertEqual(crypto.get_private_key_pem(self.request), self.private_pem)
+        private_key = crypto.get_private_key(self.request)
+        expected = serialization.load_pem_private_key(self.private_pem, password=None)
+        self.assertEqual(_public_bytes(private_key), _public_bytes(expected))
+        # Served from the per-process cache on the next call
+        self.assertIs(crypto.get_private_key(self.request), private_key)
+    
+    def test_key_is_sealed(self):
+        crypto.store_private_key(self.request, self.private_pem)
+        
+        self.assertNotIn('private_key', self.request.session)
+        self.assertNotIn(self.private_pem, cache.get(self._cache_key()))
+    
+    def test_handle_needs_secret_key(self):
+        crypto.store_private_key(self.request, self.private_pem)
+        
+        # The session (and so the handle) sits in the same cache as the
+        # sealed key; without SECRET_KEY it must not unlock anything
+        with override_settings(SECRET_KEY='another-secret-key-' + 'x' * 40):
+            self.assertIsNone(crypto.get_private_key_pem(self.request))
+    
+    def test_forget(self):
+        crypto.store_private_key(self.request, self.private_pem)
+        self.assertIsNotNone(crypto.get_private_key(self.request))
+        cache_key = self._cache_key()
+        
+        crypto.forget_session_private_key(self.request)
+        
+        self.assertIsNone(cache.get(cache_key))
+        self.assertNotIn(cache_key, crypto._session_key_cache)
+        self.assertIsNone(crypto.get_private_key(self.request))
+    
+    def test_missing_handle(self):
+        self.assertIsNone(crypto.get_private_key_pem(self.request))
+        self.assertIsNone(crypto.get_private_key(self.request))
+        crypto.forget_session_private_key(self.request)
+
+
+class LoginRateLimitTests(TestCase):
+    """Failed logins per client are capped before the hasher runs"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='alice', email='alice@example.com', password=PASSWORD
+        )
+        self.user.generate_rsa_keys(PASSWORD)
+    
+    def _login(self, password, username='alice'):
+        return self.client.post(
+            reverse('users:login'), {'username': username, 'password': password}
+        )
+    
+    def test_limit_returns_429_without_authenticating(self):
+        for i in range(LOGIN_FAILURE_LIMIT):
+            self.assertEqual(self._login('wrong', username=f'nobody{i}').status_code, 200)
+        
+        with mock.patch('users.views.UserLoginForm.is_valid') as is_valid:
+            response = self._login(PASSWORD)
+        
+        self.assertEqual(response.status_code, 429)
+        is_valid.assert_not_called()
+    
+    def test_other_clients_unaffected(self):
+        for _ in range(LOGIN_FAILURE_LIMIT):
+            self._login('wrong')
+        
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'alice', 'password': PASSWORD},
+            REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, 302)
+    
+    def test_success_resets_counter(self):
+        for _ in range(LOGIN_FAILURE_LIMIT - 1):
+            self._login('wrong')
+        self.assertEqual(self._login(PASSWORD).status_code, 302)
+        self.client.logout()
+        
+        for _ in range(LOGIN_FAILURE_LIMIT - 1):
+            self.assertEqual(self._login('wrong').status_code, 200)
+        self.assertEqual(self._login(PASSWORD).status_code, 302)
@@ -1,7 +1,9 @@
 """
 Users App URL Configuration
 """
+from django.contrib.auth.decorators import login_required
 from django.urls import path
+from django.views.generic import TemplateView
 from . import views
 
 app_name = 'users'
@@ -11,6 +13,14 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
-    path('dashboard/', views.dashboard, name='dashboard'),
-    path('profile/', views.profile, name='profile'),
+    path(
+        'dashboard/',
+        login_required(TemplateView.as_view(template_name='users/dashboard.html')),
+        name='dashboard'
+    ),
+    path(
+        'profile/',
+        login_required(TemplateView.as_view(template_name='users/profile.html')),
+        name='profile'
+    ),
 ]
@@ -2,24 +2,79 @@
 User Authentication Views
 """
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.contrib import messages
+from django.conf import settings
+from django.core.cache import cache
 from .forms import UserRegistrationForm, UserLoginForm
-from .models import CustomUser
+from .crypto import forget_session_private_key, store_private_key
+
+
+# How long browsers and CDNs may reuse the anonymous home page
+HOME_CACHE_MAX_AGE = 300
+
+# Failed logins allowed per client IP per window before login_view stops
+# running the password hasher for that client
+LOGIN_FAILURE_LIMIT = 10
+LOGIN_FAILURE_WINDOW = 300  # seconds
+
+
+def _login_failure_key(request):
+    """
+    Cache key counting a client's failed logins
+    
+    Behind a proxy (LOGIN_TRUST_X_FORWARDED_FOR) the client is the last
+    X-Forwarded-For entry, the one appended by the proxy itself.
+    """
+    client_ip = request.META.get('REMOTE_ADDR', '')
+    if settings.LOGIN_TRUST_X_FORWARDED_FOR:
+        forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded_for:
+            client_ip = forwarded_for.rsplit(',', 1)[-1].strip()
+    return f'login-failures:{client_ip}'
+
+
+def _record_login_failure(failure_key):
+    """Count a failed login; the count expires LOGIN_FAILURE_WINDOW after the first"""
+    cache.add(failure_key, 0, LOGIN_FAILURE_WINDOW)
+    try:
+        cache.incr(failure_key)
+    except ValueError:
+        # Window expired between add() and incr()
+        cache.set(failure_key, 1, LOGIN_FAILURE_WINDOW)
 
 
 def home(request):
-    """Homepage view"""
-    return render(request, 'users/home.html')
+    """
+    Homepage view
+    
+    Only requests without a session or messages cookie get a publicly
+    cacheable response. Anything else may carry a logged-in navbar or a
+    flash message and must never land in a shared cache, whether or not
+    the cache honours Vary: Cookie.
+    """
+    response = render(request, 'users/home.html')
+    
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or 'messages' in request.COOKIES:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=HOME_CACHE_MAX_AGE)
+    patch_vary_headers(response, ['Cookie'])
+    
+    return response
 
 
+@require_http_methods(['GET', 'POST'])
 def register(request):
     """
     User registration view
     - Creates new user account
     - Generates RSA keys encrypted with password
-    - Logs user in automatically
+    - Logs user in automatically, with the new private key already
+      unlocked for the session
     """
     if request.user.is_authenticated:
         return redirect('users:dashboard')
@@ -32,7 +87,10 @@ def register(request):
             
             # Generate RSA keys for encryption
             password = form.cleaned_data.get('password1')
-            user.generate_rsa_keys(password)
+            private_key = user.generate_rsa_keys(password)
+            
+            # Keep the fresh key so downloads work without logging in again
+            store_private_key(request, private_key)
             
             # Log the user in
             login(request, user)
@@ -45,41 +103,59 @@ def register(request):
     return render(request, 'users/register.html', {'form': form})
 
 
+@require_http_methods(['GET', 'POST'])
 def login_view(request):
     """
     User login view
-    - Authenticates user
+    - Authenticates user (once, inside AuthenticationForm.clean)
     - Decrypts RSA private key and stores in session
     """
     if request.user.is_authenticated:
         return redirect('users:dashboard')
     
     if request.method == 'POST':
+        failure_key = _login_failure_key(request)
+        
+        # Over the limit: reject before authenticate() runs the hasher
+        if cache.get(failure_key, 0) >= LOGIN_FAILURE_LIMIT:
+            messages.error(request, 'Too many failed login attempts. Please try again later.')
+            return render(request, 'users/login.html', {'form': UserLoginForm()}, status=429)
+        
         form = UserLoginForm(data=request.POST)
         if form.is_valid():
-            username = form.cleaned_data.get('username')
             password = form.cleaned_data.get('password')
             
-            # Authenticate user
-            user = authenticate(username=username, password=password)
+            # The form has already run authenticate(); calling it again
+            # would hash the password a second time
+            user = form.get_user()
             
             if user is not None:
-                # Decrypt RSA private key with password
+                # Decrypt RSA private key with password (one KDF pass)
                 private_key = user.decrypt_private_key(password)
                 
                 if private_key:
-                    # Store decrypted key in session (encrypted by Django)
-                    request.session['private_key'] = private_key.decode('utf-8')
+                    # Move legacy PBKDF2-protected keys to Argon2id
+                    if user.private_key_needs_rewrap():
+                        user.rewrap_private_key(private_key, password)
+                    
+                    # Session keeps only a handle; the key itself is cached
+                    # encrypted under a key derived from that handle
+                    store_private_key(request, private_key)
                     
                     # Log user in
                     login(request, user)
                     
+                    # Earlier typos from this client no longer count
+                    cache.delete(failure_key)
+                    
                     messages.success(request, f'Welcome back, {user.username}!')
                     return redirect('users:dashboard')
                 else:
                     messages.error(request, 'Failed to decrypt encryption keys.')
             else:
                 messages.error(request, 'Invalid username or password.')
+        else:
+            _record_login_failure(failure_key)
     else:
         form = UserLoginForm()
     
@@ -90,24 +166,12 @@ def login_view(request):
 def logout_view(request):
     """
     User logout view
-    - Clears session (including decrypted private key)
+    - Drops the cached private key, then logout() flushes the session
     """
-    # Clear private key from session
-    if 'private_key' in request.session:
-        del request.session['private_key']
+    # Drop the cached private key and its parsed copy; the handle itself
+    # goes with the session flush
+    forget_session_private_key(request)
     
     logout(request)
     messages.info(request, 'You have been logged out.')
     return redirect('users:home')
-
-
-@login_required
-def dashboard(request):
-    """User dashboard view"""
-    return render(request, 'users/dashboard.html')
-
-
-@login_required
-def profile(request):
-    """User profile view"""
-    return render(request, 'users/profile.html')